@@ -0,0 +1,146 @@
+"""
+Equivalence check for the transform modes on a mixed raw folder.
+
+Builds a scratch data/raw with synthetic rows (see synthetic.py) in every
+raw format the transform accepts: NDJSON and Parquet as extract.py writes
+them, and legacy JSON arrays (<combination>_<from>_<to>.json) as older
+versions wrote them, some next to a current file of the same combination.
+Each transform mode (serial, pool, streaming) then runs on its own copy; the processed output must
+be the same as the serial transform's. Exits with status 1 otherwise.
+
+    python bench/check_transform.py
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from itertools import product
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, SRC_DIR)
+
+import pandas as pd
+from synthetic import ALL_COMMODITIES, ALL_METRICS, ALL_STATES, generate_rows
+from extract import project_row, raw_filename, write_raw
+from records import NATURAL_KEY, normalize_observations
+from processed import read_processed
+import transform
+
+# Columns kept by the legacy extract (values already parsed, no revisions)
+LEGACY_COLUMNS = ["year", "state_name", "commodity_desc", "statisticcat_desc", "unit_desc", "value"]
+
+
+def legacy_rows(rows):
+    legacy = []
+    for row in rows:
+        try:
+            value = float(str(row["Value"]).replace(",", ""))
+        except ValueError:
+            continue
+        legacy.append({**{c: row.get(c) for c in LEGACY_COLUMNS[:-1]}, "value": value})
+    return legacy
+
+
+def build_raw_folder(raw_folder, commodities, states, year_from, year_to):
+    """Write one raw file per combination, cycling through the formats."""
+    os.makedirs(raw_folder)
+    formats = ["ndjson", "parquet", "legacy", "ndjson+legacy"]
+    combinations = list(product(commodities, ALL_METRICS, states))
+
+    for i, (commodity, metric, state) in enumerate(combinations):
+        raw_format = formats[i % len(formats)]
+        rows = list(generate_rows([commodity], [metric], [state], year_from, year_to, seed=i))
+
+        if "legacy" in raw_format:
+            name = raw_filename(commodity, metric, state, "ndjson")
+            legacy_name = f"{os.path.splitext(name)[0]}_{year_from}_{year_to}.json"
+            with open(os.path.join(raw_folder, legacy_name), "w") as f:
+                json.dump(legacy_rows(rows), f, indent=2)
+
+        if raw_format != "legacy":
+            current = raw_format.split("+")[0]
+            df, _ = normalize_observations(pd.DataFrame([project_row(r) for r in rows]))
+            write_raw(df, os.path.join(raw_folder, raw_filename(commodity, metric, state, current)), current)
+
+    return len(combinations)
+
+
+def run_mode(name, source, workdir, **kwargs):
+    """Run one transform mode on a copy of the raw folder; returns its sorted output."""
+    folder = os.path.join(workdir, name)
+    shutil.copytree(source, os.path.join(folder, "data", "raw"))
+
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        if kwargs.pop("stream", False):
+            transform.process_all_raw_streaming(**kwargs)
+        else:
+            transform.process_all_raw(**kwargs)
+        df = read_processed()
+    finally:
+        os.chdir(cwd)
+
+    return df.sort_values(NATURAL_KEY, ignore_index=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transform modes equivalence on mixed raw formats")
+    parser.add_argument("--commodities", type=int, default=3)
+    parser.add_argument("--states", type=int, default=4)
+    parser.add_argument("--year-from", type=int, default=2020)
+    parser.add_argument("--year-to", type=int, default=2024)
+    parser.add_argument("--workers", type=int, default=2)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    modes = {
+        "serial": {"workers": 1},
+        "pool": {"workers": args.workers},
+        "stream": {"stream": True, "workers": args.workers},
+        # A zero budget flushes after every file group: one batch per combination
+        "stream per group": {"stream": True, "workers": 1, "memory_budget_mb": 0},
+    }
+
+    workdir = tempfile.mkdtemp(prefix="usda-check-transform-")
+    try:
+        source = os.path.join(workdir, "raw")
+        files = build_raw_folder(
+            source, ALL_COMMODITIES[:args.commodities], ALL_STATES[:args.states],
+            args.year_from, args.year_to,
+        )
+        print(f"[CHECK] {files} combinations, {len(os.listdir(source))} raw files ({workdir})")
+
+        expected = None
+        failures = 0
+        for name, kwargs in modes.items():
+            try:
+                df = run_mode(name, source, workdir, **kwargs)
+            except Exception as e:
+                failures += 1
+                print(f"[MISMATCH] {name}: {type(e).__name__}: {e}")
+                continue
+
+            if expected is None:
+                expected = df
+                print(f"[CHECK] {name}: {len(df)} rows")
+                continue
+            try:
+                pd.testing.assert_frame_equal(df, expected)
+                print(f"[CHECK] {name}: {len(df)} rows, same as serial")
+            except AssertionError as e:
+                failures += 1
+                print(f"[MISMATCH] {name}: {e}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    sys.exit(1 if failures or expected is None else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare two benchmark result files from run_bench.py.
+
+    python bench/compare.py bench/results/base.json bench/results/new.json
+
+Prints wall time, rows/sec, peak RSS and request counts per scale and stage
+with the relative change. Exits with status 1 when a stage got slower than
+--threshold percent, so it can gate a CI job.
+"""
+import argparse
+import json
+import sys
+
+METRICS = [
+    # (key, label, higher_is_better)
+    ("seconds", "wall s", False),
+    ("rows_per_sec", "rows/s", True),
+    ("peak_rss_mb", "RSS MB", False),
+]
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def change(old, new):
+    """Relative change in percent, or None when not comparable."""
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) * 100.0 / old
+
+
+def format_cell(old, new):
+    delta = change(old, new)
+    delta_text = "" if delta is None else f" ({delta:+.1f}%)"
+    return f"{old} → {new}{delta_text}"
+
+
+def compare(base, new, threshold):
+    """Print the comparison; returns the list of regressions found."""
+    regressions = []
+    print(f"base: {base.get('commit')} ({base.get('timestamp')})")
+    print(f"new:  {new.get('commit')} ({new.get('timestamp')})")
+
+    for scale, new_scale in new.get("scales", {}).items():
+        base_scale = base.get("scales", {}).get(scale)
+        if base_scale is None:
+            print(f"\n[{scale}] not in base results")
+            continue
+
+        print(f"\n[{scale}] {new_scale.get('source_rows', 0):,} source rows")
+        for stage, new_stage in new_scale["stages"].items():
+            base_stage = base_scale["stages"].get(stage, {})
+            if new_stage.get("status") != "ok" or base_stage.get("status") != "ok":
+                print(f"  {stage:<10} base={base_stage.get('status')} new={new_stage.get('status')}")
+                continue
+
+            cells = [
+                f"{label}: {format_cell(base_stage.get(key), new_stage.get(key))}"
+                for key, label, _ in METRICS
+            ]
+            print(f"  {stage:<10} " + " | ".join(cells))
+
+            if "http" in new_stage:
+                old_http, new_http = base_stage.get("http", {}), new_stage["http"]
+                print(f"  {'':<10} requests: {old_http.get('requests')} → {new_http.get('requests')}"
+                      f" (429: {old_http.get('rate_limited')} → {new_http.get('rate_limited')},"
+                      f" 413: {old_http.get('too_large')} → {new_http.get('too_large')})")
+
+            slower = change(base_stage.get("seconds"), new_stage.get("seconds"))
+            if slower is not None and slower > threshold:
+                regressions.append(f"{scale}/{stage}: {slower:+.1f}% wall time")
+
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare two benchmark results")
+    parser.add_argument("base", help="Baseline result JSON")
+    parser.add_argument("new", help="New result JSON")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Wall-time regression (percent) that fails the comparison")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    regressions = compare(load_results(args.base), load_results(args.new), args.threshold)
+
+    if regressions:
+        print("\nRegressions above threshold:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
@@ -0,0 +1,169 @@
+"""
+Local stand-in for the Quick Stats api_GET endpoint.
+
+Serves synthetic rows (see synthetic.py) for the multi-valued queries
+extract.py sends, honouring their agg_level_desc filter, with configurable latency and a ratio of 429 responses,
+and rejects responses above the row limit with HTTP 413 like the real API.
+Request counts are kept in MockQuickStats.stats.
+
+Standalone: python bench/mock_server.py --port 8765 --latency-ms 50
+then run the pipeline with USDA_BASE_URL=http://127.0.0.1:8765/api/api_GET/
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from synthetic import AGG_LEVELS, ALL_METRICS, count_rows, generate_rows
+
+ROW_LIMIT = 50000
+
+
+class MockQuickStats:
+    def __init__(
+        self,
+        port=0,
+        latency_ms=0.0,
+        rate_limit_ratio=0.0,
+        counties=0,
+        suppression_ratio=0.05,
+        row_limit=ROW_LIMIT,
+        seed=0
+    ):
+        self.latency_ms = latency_ms
+        self.rate_limit_ratio = rate_limit_ratio
+        self.counties = counties
+        self.suppression_ratio = suppression_ratio
+        self.row_limit = row_limit
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/api/api_GET/"
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats.update(requests=0, rate_limited=0, too_large=0, no_data=0, ok=0, rows=0)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def send_json(self, handler, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler):
+        self.count("requests")
+        url = urlparse(handler.path)
+        query = parse_qs(url.query)
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000 * self.random.uniform(0.5, 1.5))
+
+        if not url.path.rstrip("/").endswith("api_GET"):
+            return self.send_json(handler, 404, {"error": ["not found"]})
+        if not query.get("key"):
+            return self.send_json(handler, 401, {"error": ["unauthorized"]})
+
+        with self.lock:
+            limited = self.random.random() < self.rate_limit_ratio
+        if limited:
+            self.count("rate_limited")
+            return self.send_json(handler, 429, {"error": ["too many requests"]}, {"Retry-After": "0"})
+
+        commodities = query.get("commodity_desc", [])
+        metrics = query.get("statisticcat_desc", ALL_METRICS)
+        states = query.get("state_alpha", [])
+        levels = query.get("agg_level_desc", AGG_LEVELS)
+        try:
+            year_from = int(query.get("year__GE", ["0"])[0])
+            year_to = int(query.get("year__LE", [str(year_from)])[0])
+        except ValueError:
+            return self.send_json(handler, 400, {"error": ["bad request - invalid year"]})
+
+        total = count_rows(commodities, metrics, states, year_from, year_to, self.counties, levels)
+        if total > self.row_limit:
+            self.count("too_large")
+            return self.send_json(handler, 413, {"error": [f"exceeds limit={self.row_limit}"]})
+        if total == 0:
+            # The real API answers an empty result with 400
+            self.count("no_data")
+            return self.send_json(handler, 400, {"error": ["bad request - no data"]})
+
+        rows = list(generate_rows(
+            commodities, metrics, states, year_from, year_to,
+            counties=self.counties,
+            suppression_ratio=self.suppression_ratio,
+            seed=self.seed,
+            levels=levels,
+        ))
+        self.count("ok")
+        self.count("rows", len(rows))
+        self.send_json(handler, 200, {"data": rows})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock Quick Stats api_GET server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean response latency")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of requests answered 429")
+    parser.add_argument("--counties", type=int, default=0, help="County rows per state row (agg_level_desc=COUNTY)")
+    parser.add_argument("--suppression-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = MockQuickStats(
+        port=args.port,
+        latency_ms=args.latency_ms,
+        rate_limit_ratio=args.rate_limit_ratio,
+        counties=args.counties,
+        suppression_ratio=args.suppression_ratio,
+        seed=args.seed,
+    )
+    print(f"Mock Quick Stats listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,248 @@
+"""
+Parity check between the MySQL and DuckDB query backends.
+
+Runs the API's report, export and summary queries (src/api/queries.py)
+over a matrix of filters on both backends and compares the results:
+- report pages are walked to the end with their cursors; rows must match
+  as multisets (ids and state_ids differ between backends) and in year order
+- summary rows must match in order, for both the summary table and the
+  direct GROUP BY path, with and without yoy; on each backend the summary
+  table must also give the same totals as the direct GROUP BY
+- production value rows must match in order
+Floats are compared with a relative tolerance: MySQL stores value as FLOAT.
+
+Both backends must hold the same processed output. Run from the folder
+holding data/processed (or set DUCKDB_PROCESSED_PATH), with the MySQL
+database given as PARITY_DB_URI or the MYSQL_* variables; --load first
+loads the processed output into it (swap mode), then upserts it again,
+both through LOAD DATA LOCAL INFILE. Never point --load at a production
+database.
+
+    python bench/parity.py --load
+"""
+import argparse
+import math
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+from itertools import product
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(REPO_DIR, "src")
+sys.path[:0] = [REPO_DIR, SRC_DIR]
+
+from sqlalchemy import create_engine
+from src.api.queries import (
+    GROUP_COLUMNS,
+    REPORT_FIELDS,
+    STATISTICS,
+    build_export_query,
+    build_production_value_query,
+    build_report_query,
+    build_summary_query,
+    encode_cursor,
+)
+from duckdb_store import DuckDBStore
+
+PAGE_LIMIT = 1000
+# Significant digits kept when floats are used as multiset keys
+KEY_DIGITS = 6
+
+
+def mysql_uri():
+    uri = os.getenv("PARITY_DB_URI")
+    if uri:
+        return uri
+
+    names = ["MYSQL_USER", "MYSQL_PASSWORD", "MYSQL_HOST", "MYSQL_DATABASE"]
+    if not all(os.getenv(n) for n in names):
+        sys.exit("Set PARITY_DB_URI or the MYSQL_* variables")
+    user, password, host, database = (os.getenv(n) for n in names)
+    return f"mysql+pymysql://{user}:{password}@{host}/{database}"
+
+
+def load_mysql(uri):
+    """Load the processed output into the MySQL database under test."""
+    import load
+    from processed import iter_processed
+    from derived import read_production_value
+
+    load.engine = create_engine(uri, connect_args={"local_infile": True})
+    # Both passes take the LOAD DATA path whatever the size; the upsert pass
+    # merges every row into an existing one (ON DUPLICATE KEY UPDATE)
+    if load.load_batches(iter_processed(columns=load.LOAD_COLUMNS), mode="swap", bulk=True) is None:
+        sys.exit("Load into MySQL failed")
+    if load.load_batches(iter_processed(columns=load.LOAD_COLUMNS), mode="upsert", bulk=True) is None:
+        sys.exit("Bulk upsert into MySQL failed")
+    if load.load_production_value(read_production_value()) is None:
+        sys.exit("Production value load into MySQL failed")
+
+
+class MySQLBackend:
+    def __init__(self, uri):
+        self.engine = create_engine(uri)
+
+    def fetch(self, query, params):
+        with self.engine.connect() as conn:
+            return [dict(r) for r in conn.execute(query, params).mappings().all()]
+
+
+class DuckDBBackend:
+    def __init__(self):
+        self.store = DuckDBStore()
+
+    def fetch(self, query, params):
+        return self.store.fetch_mappings(query, params)
+
+
+def normalize(value):
+    """Comparable form of a value: floats rounded, datetimes without microseconds."""
+    if isinstance(value, float):
+        return float(f"{value:.{KEY_DIGITS}g}")
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0)
+    if hasattr(value, "__float__") and not isinstance(value, (int, bool)):
+        return normalize(float(value))
+    return value
+
+
+def same_value(a, b, rel_tol):
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return math.isclose(a, b, rel_tol=rel_tol, abs_tol=rel_tol)
+    return normalize(a) == normalize(b)
+
+
+def fetch_pages(backend, statistic, filters):
+    """Every row of a paginated report, following next cursors."""
+    fields = [f for f in REPORT_FIELDS if f != "id"]
+    rows, cursor = [], None
+    while True:
+        query, params = build_report_query(statistic, fields, cursor=cursor, limit=PAGE_LIMIT, **filters)
+        page = backend.fetch(query, params)
+        rows.extend(page[:PAGE_LIMIT])
+        if len(page) <= PAGE_LIMIT:
+            return rows
+
+        cursor = encode_cursor(page[PAGE_LIMIT - 1])
+
+
+def compare_rows(mysql_rows, duckdb_rows, fields):
+    """Multiset comparison of report rows, plus their year order."""
+    if len(mysql_rows) != len(duckdb_rows):
+        return f"{len(mysql_rows)} vs {len(duckdb_rows)} rows"
+
+    # Within a year rows follow state_id, assigned differently by each backend
+    if [r["year"] for r in mysql_rows] != [r["year"] for r in duckdb_rows]:
+        return "different year order"
+
+    key = lambda r: tuple(normalize(r[f]) for f in fields)
+    missing = Counter(map(key, mysql_rows)) - Counter(map(key, duckdb_rows))
+    if missing:
+        return f"{sum(missing.values())} rows differ, e.g. {next(iter(missing))}"
+    return None
+
+
+def compare_ordered(mysql_rows, duckdb_rows, rel_tol):
+    if len(mysql_rows) != len(duckdb_rows):
+        return f"{len(mysql_rows)} vs {len(duckdb_rows)} rows"
+
+    for i, (a, b) in enumerate(zip(mysql_rows, duckdb_rows)):
+        if a.keys() != b.keys():
+            return f"row {i}: columns {list(a)} vs {list(b)}"
+        for column in a:
+            if not same_value(a[column], b[column], rel_tol):
+                return f"row {i}: {column} {a[column]!r} vs {b[column]!r}"
+    return None
+
+
+def filter_matrix(store):
+    """Filter combinations drawn from the data itself."""
+    rows = store.fetch_mappings(
+        "SELECT state_name, commodity_desc, MIN(year) AS first_year, MAX(year) AS last_year "
+        "FROM usda_observations GROUP BY state_name, commodity_desc "
+        "ORDER BY COUNT(*) DESC LIMIT 1"
+    )
+    if not rows:
+        sys.exit("The processed output is empty")
+    sample = rows[0]
+
+    return [
+        {},
+        {"state": sample["state_name"]},
+        {"commodity": sample["commodity_desc"]},
+        {"year_from": sample["last_year"] - 1},
+        {"state": sample["state_name"], "commodity": sample["commodity_desc"],
+         "year_from": sample["first_year"], "year_to": sample["last_year"]},
+    ]
+
+
+def run_checks(mysql, duckdb, rel_tol):
+    """Yield (name, error or None) for every query in the matrix."""
+    filters = filter_matrix(duckdb.store)
+    fields = [f for f in REPORT_FIELDS if f != "id"]
+
+    for statistic, f in product(STATISTICS.values(), filters):
+        name = f"report {statistic} {f}"
+        yield name, compare_rows(fetch_pages(mysql, statistic, f), fetch_pages(duckdb, statistic, f), fields)
+
+    for f in filters:
+        query, params = build_export_query(None, fields, **f)
+        yield f"export {f}", compare_rows(mysql.fetch(query, params), duckdb.fetch(query, params), fields)
+
+    group_sets = [["year"], ["year", "state"], ["state", "commodity"], list(GROUP_COLUMNS)]
+    for statistic, groups, yoy, use_summary, f in product(
+        STATISTICS.values(), group_sets, [False, True], [False, True], filters[:3]
+    ):
+        if yoy and "year" not in groups:
+            continue
+        aggs = ["mean", "sum", "count", "min", "max"]
+        query, params = build_summary_query(statistic, groups, aggs, yoy, use_summary=use_summary, **f)
+        name = f"summary {statistic} {groups} yoy={yoy} summary_table={use_summary} {f}"
+        yield name, compare_ordered(mysql.fetch(query, params), duckdb.fetch(query, params), rel_tol)
+
+    for (name, backend), statistic, groups in product(
+        [("mysql", mysql), ("duckdb", duckdb)], STATISTICS.values(), group_sets
+    ):
+        aggs = ["mean", "sum", "count", "min", "max"]
+        direct, summary = (
+            backend.fetch(*build_summary_query(statistic, groups, aggs, use_summary=use_summary))
+            for use_summary in (False, True)
+        )
+        yield f"summary table vs GROUP BY {name} {statistic} {groups}", compare_ordered(direct, summary, rel_tol)
+
+    for f in filters:
+        query, params = build_production_value_query(**f)
+        yield f"production value {f}", compare_ordered(mysql.fetch(query, params), duckdb.fetch(query, params), rel_tol)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="MySQL vs DuckDB backend parity")
+    parser.add_argument("--load", action="store_true", help="Load the processed output into MySQL first")
+    parser.add_argument("--rel-tol", type=float, default=1e-4, help="Relative tolerance for floats")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    uri = mysql_uri()
+    if args.load:
+        load_mysql(uri)
+
+    failures = 0
+    checks = 0
+    for name, error in run_checks(MySQLBackend(uri), DuckDBBackend(), args.rel_tol):
+        checks += 1
+        if error:
+            failures += 1
+            print(f"[MISMATCH] {name}: {error}")
+
+    print(f"\n[PARITY] {checks - failures}/{checks} queries match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
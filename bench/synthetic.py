@@ -0,0 +1,182 @@
+"""
+Synthetic Quick Stats payloads for benchmarks.
+
+Rows look like /api/api_GET/ records (same field names, values published as
+text with thousands separators and suppression codes). Generation is
+deterministic: the same arguments and seed always produce the same rows.
+"""
+import argparse
+import json
+import random
+
+STATE_NAMES = {
+    "AL": "ALABAMA", "AK": "ALASKA", "AZ": "ARIZONA", "AR": "ARKANSAS",
+    "CA": "CALIFORNIA", "CO": "COLORADO", "CT": "CONNECTICUT", "DE": "DELAWARE",
+    "FL": "FLORIDA", "GA": "GEORGIA", "HI": "HAWAII", "ID": "IDAHO",
+    "IL": "ILLINOIS", "IN": "INDIANA", "IA": "IOWA", "KS": "KANSAS",
+    "KY": "KENTUCKY", "LA": "LOUISIANA", "ME": "MAINE", "MD": "MARYLAND",
+    "MA": "MASSACHUSETTS", "MI": "MICHIGAN", "MN": "MINNESOTA", "MS": "MISSISSIPPI",
+    "MO": "MISSOURI", "MT": "MONTANA", "NE": "NEBRASKA", "NV": "NEVADA",
+    "NH": "NEW HAMPSHIRE", "NJ": "NEW JERSEY", "NM": "NEW MEXICO", "NY": "NEW YORK",
+    "NC": "NORTH CAROLINA", "ND": "NORTH DAKOTA", "OH": "OHIO", "OK": "OKLAHOMA",
+    "OR": "OREGON", "PA": "PENNSYLVANIA", "RI": "RHODE ISLAND", "SC": "SOUTH CAROLINA",
+    "SD": "SOUTH DAKOTA", "TN": "TENNESSEE", "TX": "TEXAS", "UT": "UTAH",
+    "VT": "VERMONT", "VA": "VIRGINIA", "WA": "WASHINGTON", "WV": "WEST VIRGINIA",
+    "WI": "WISCONSIN", "WY": "WYOMING",
+}
+ALL_STATES = list(STATE_NAMES)
+ALL_COMMODITIES = ["CORN", "SOYBEANS", "WHEAT", "OATS", "BARLEY", "SORGHUM"]
+ALL_METRICS = ["PRICE RECEIVED", "PRODUCTION", "YIELD"]
+
+UNITS = {
+    "PRICE RECEIVED": "$ / BU",
+    "PRODUCTION": "BU",
+    "YIELD": "BU / ACRE",
+}
+# (reference_period_desc, freq_desc) published per year
+PERIODS = {
+    "PRICE RECEIVED": [("MARKETING YEAR", "ANNUAL")] + [
+        (month, "MONTHLY")
+        for month in ["JAN", "FEB", "MAR", "APR", "MAY", "JUN",
+                      "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+    ],
+    "PRODUCTION": [("YEAR", "ANNUAL"), ("YEAR - AUG FORECAST", "ANNUAL"), ("YEAR - NOV FORECAST", "ANNUAL")],
+    "YIELD": [("YEAR", "ANNUAL"), ("YEAR - AUG FORECAST", "ANNUAL"), ("YEAR - NOV FORECAST", "ANNUAL")],
+}
+# Typical magnitude of a state-level value
+VALUE_RANGES = {
+    "PRICE RECEIVED": (2.0, 15.0),
+    "PRODUCTION": (1e6, 2.5e9),
+    "YIELD": (30.0, 220.0),
+}
+SUPPRESSION_CODES = ["(D)", "(Z)", "(NA)", "(X)", "(S)"]
+# agg_level_desc values generated (all of them when a query does not filter)
+AGG_LEVELS = ["STATE", "COUNTY"]
+
+
+def areas_of(counties=0, levels=AGG_LEVELS):
+    """(agg_level_desc, county_name) of the rows generated per state."""
+    areas = []
+    if "STATE" in levels:
+        areas.append(("STATE", ""))
+    if "COUNTY" in levels:
+        areas.extend(("COUNTY", f"COUNTY {n:03d}") for n in range(1, counties + 1))
+    return areas
+
+
+def rows_per_year(metric, counties=0, levels=AGG_LEVELS):
+    """Rows generated per (commodity, metric, state, year)."""
+    return len(PERIODS.get(metric, [("YEAR", "ANNUAL")])) * len(areas_of(counties, levels))
+
+
+def count_rows(commodities, metrics, states, year_from, year_to, counties=0, levels=AGG_LEVELS):
+    """Number of rows generate_rows would yield, without generating them."""
+    years = max(0, year_to - year_from + 1)
+    return sum(
+        rows_per_year(metric, counties, levels) * years * len(commodities) * len(states)
+        for metric in metrics
+    )
+
+
+def format_value(value, metric):
+    if metric == "PRODUCTION":
+        return f"{value:,.0f}"
+    return f"{value:.2f}"
+
+
+def generate_rows(
+    commodities,
+    metrics,
+    states,
+    year_from,
+    year_to,
+    counties=0,
+    suppression_ratio=0.05,
+    seed=0,
+    levels=AGG_LEVELS
+):
+    """
+    Yield Quick Stats rows for every commodity × metric × state × year.
+    Each state gets one STATE-level row per reference period, plus `counties`
+    COUNTY-level rows (county fan-out); levels restricts them like the
+    agg_level_desc filter. Values do not depend on levels. About
+    suppression_ratio of the values are published as suppression codes.
+    """
+    areas = areas_of(counties, levels)
+    for commodity in commodities:
+        for metric in metrics:
+            periods = PERIODS.get(metric, [("YEAR", "ANNUAL")])
+            unit = UNITS.get(metric, "UNITS")
+            low, high = VALUE_RANGES.get(metric, (1.0, 100.0))
+            short_desc = f"{commodity} - {metric}, MEASURED IN {unit}"
+
+            for state in states:
+                for year in range(year_from, year_to + 1):
+                    key = f"{seed}|{commodity}|{metric}|{state}|{year}"
+                    base = random.Random(key).uniform(low, high)
+                    # One generator per area, so a level's rows do not depend on the others
+                    rngs = [random.Random(f"{key}|{county}") for _, county in areas]
+
+                    for i, (period, freq) in enumerate(periods):
+                        load_time = f"{year + 1}-{1 + i % 12:02d}-15 12:00:00.000"
+
+                        for (level, county), rng in zip(areas, rngs):
+                            # Counties split the state's production; rates stay comparable
+                            scale = 1.0 / counties if level == "COUNTY" and metric == "PRODUCTION" else 1.0
+                            if rng.random() < suppression_ratio:
+                                value = rng.choice(SUPPRESSION_CODES)
+                            else:
+                                value = format_value(base * scale * rng.uniform(0.9, 1.1), metric)
+
+                            yield {
+                                "source_desc": "SURVEY",
+                                "sector_desc": "CROPS",
+                                "group_desc": "FIELD CROPS",
+                                "commodity_desc": commodity,
+                                "statisticcat_desc": metric,
+                                "unit_desc": unit,
+                                "short_desc": short_desc,
+                                "agg_level_desc": level,
+                                "state_alpha": state,
+                                "state_name": STATE_NAMES.get(state, state),
+                                "county_name": county,
+                                "year": year,
+                                "reference_period_desc": period,
+                                "freq_desc": freq,
+                                "load_time": load_time,
+                                "Value": value,
+                            }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Write a synthetic Quick Stats JSON payload")
+    parser.add_argument("--commodities", type=int, default=3, help="Number of commodities")
+    parser.add_argument("--states", type=int, default=5, help="Number of states")
+    parser.add_argument("--year-from", type=int, default=2020)
+    parser.add_argument("--year-to", type=int, default=2024)
+    parser.add_argument("--counties", type=int, default=0, help="County rows per state row")
+    parser.add_argument("--suppression-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="Output file (default stdout)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rows = generate_rows(
+        ALL_COMMODITIES[:args.commodities],
+        ALL_METRICS,
+        ALL_STATES[:args.states],
+        args.year_from,
+        args.year_to,
+        counties=args.counties,
+        suppression_ratio=args.suppression_ratio,
+        seed=args.seed,
+    )
+    payload = json.dumps({"data": list(rows)})
+
+    if args.output == "-":
+        print(payload)
+    else:
+        with open(args.output, "w") as f:
+            f.write(payload)
@@ -0,0 +1,15 @@
+-- Migration: Data version stamp
+-- Description: Single-row table bumped by every ETL load. The API includes
+-- the version in its response cache keys and ETags, so cached reports are
+-- invalidated exactly when new data lands.
+
+USE usda_etl_pipeline;
+
+CREATE TABLE etl_data_version (
+    id TINYINT UNSIGNED NOT NULL,
+    version BIGINT UNSIGNED NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO etl_data_version (id, version) VALUES (1, 1);
@@ -0,0 +1,105 @@
+-- Migration: Dimension tables and report indexes
+-- Description: Moves the repeated state/commodity/statistic/unit strings into
+-- small dimension tables referenced by integer ids from a new fact table,
+-- usda_facts, indexed for the API's access pattern
+-- (filter on statistic, sort by year and state).
+-- usda_observations becomes a view with the original column names, so
+-- existing queries keep working unchanged.
+-- Requires migration_add_natural_key.sql.
+
+USE usda_etl_pipeline;
+
+-- Dimensions
+CREATE TABLE dim_state (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_state_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE dim_commodity (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_commodity_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE dim_statistic (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_statistic_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE dim_unit (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_unit_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- States are inserted in alphabetical order so existing ids sort like names
+INSERT INTO dim_state (name)
+SELECT DISTINCT state_name FROM usda_observations ORDER BY state_name;
+INSERT INTO dim_commodity (name)
+SELECT DISTINCT commodity_desc FROM usda_observations ORDER BY commodity_desc;
+INSERT INTO dim_statistic (name)
+SELECT DISTINCT statisticcat_desc FROM usda_observations ORDER BY statisticcat_desc;
+INSERT INTO dim_unit (name)
+SELECT DISTINCT unit_desc FROM usda_observations ORDER BY unit_desc;
+
+-- Fact table
+CREATE TABLE usda_facts (
+    id INT NOT NULL AUTO_INCREMENT,
+    year SMALLINT NOT NULL,
+    state_id SMALLINT UNSIGNED NOT NULL,
+    commodity_id SMALLINT UNSIGNED NOT NULL,
+    statistic_id SMALLINT UNSIGNED NOT NULL,
+    unit_id SMALLINT UNSIGNED NOT NULL,
+    reference_period_desc VARCHAR(40) NOT NULL DEFAULT '',
+    value FLOAT DEFAULT NULL,
+    updated_at TIMESTAMP NULL DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_observation (
+        year, state_id, commodity_id, statistic_id, unit_id, reference_period_desc
+    ),
+    -- Reports: WHERE statistic = ? ORDER BY year, state (covering)
+    KEY ix_statistic_year_state (
+        statistic_id, year, state_id, commodity_id, unit_id, value
+    ),
+    -- Filters by commodity or state within a statistic
+    KEY ix_statistic_commodity_year (statistic_id, commodity_id, year),
+    KEY ix_statistic_state_year (statistic_id, state_id, year)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO usda_facts (
+    id, year, state_id, commodity_id, statistic_id, unit_id,
+    reference_period_desc, value, updated_at
+)
+SELECT o.id, o.year, s.id, c.id, st.id, u.id,
+       o.reference_period_desc, o.value, o.updated_at
+FROM usda_observations o
+JOIN dim_state s ON s.name = o.state_name
+JOIN dim_commodity c ON c.name = o.commodity_desc
+JOIN dim_statistic st ON st.name = o.statisticcat_desc
+JOIN dim_unit u ON u.name = o.unit_desc;
+
+DROP TABLE usda_observations;
+
+-- Backwards-compatible view with the original column names
+CREATE VIEW usda_observations AS
+SELECT
+    f.id,
+    f.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    f.reference_period_desc,
+    f.value,
+    f.updated_at
+FROM usda_facts f
+JOIN dim_state s ON s.id = f.state_id
+JOIN dim_commodity c ON c.id = f.commodity_id
+JOIN dim_statistic st ON st.id = f.statistic_id
+JOIN dim_unit u ON u.id = f.unit_id;
@@ -0,0 +1,52 @@
+-- Migration: Dimension foreign keys and the report paging index
+-- Description: declares the dimension ids of usda_facts, usda_summary and
+-- usda_production_value as foreign keys of the dimension tables, and adds
+-- the index report pages are read from (WHERE statistic = ? ORDER BY
+-- year DESC, state_id, id), so paging needs no filesort. usda_observations
+-- exposes state_id, which the API's keyset cursors now carry; cursors
+-- issued before this migration are rejected as invalid.
+-- Foreign keys are left unnamed: RENAME TABLE renames the generated
+-- <table>_ibfk_<n> names along with the table, as swap loads require.
+-- Requires migration_add_unit_and_price_ton.sql.
+
+USE usda_etl_pipeline;
+
+ALTER TABLE usda_facts
+    ADD KEY ix_statistic_year_desc_state (statistic_id, year DESC, state_id, id),
+    ADD FOREIGN KEY (state_id) REFERENCES dim_state (id),
+    ADD FOREIGN KEY (commodity_id) REFERENCES dim_commodity (id),
+    ADD FOREIGN KEY (statistic_id) REFERENCES dim_statistic (id),
+    ADD FOREIGN KEY (unit_id) REFERENCES dim_unit (id);
+
+ALTER TABLE usda_summary
+    ADD FOREIGN KEY (state_id) REFERENCES dim_state (id),
+    ADD FOREIGN KEY (commodity_id) REFERENCES dim_commodity (id),
+    ADD FOREIGN KEY (statistic_id) REFERENCES dim_statistic (id),
+    ADD FOREIGN KEY (unit_id) REFERENCES dim_unit (id);
+
+ALTER TABLE usda_production_value
+    ADD FOREIGN KEY (state_id) REFERENCES dim_state (id),
+    ADD FOREIGN KEY (commodity_id) REFERENCES dim_commodity (id);
+
+CREATE OR REPLACE VIEW usda_observations AS
+SELECT
+    f.id,
+    f.year,
+    f.state_id,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    f.reference_period_desc,
+    f.freq_desc,
+    f.short_desc,
+    f.load_time,
+    f.value,
+    f.normalized_unit,
+    f.normalized_value,
+    f.updated_at
+FROM usda_facts f
+JOIN dim_state s ON s.id = f.state_id
+JOIN dim_commodity c ON c.id = f.commodity_id
+JOIN dim_statistic st ON st.id = f.statistic_id
+JOIN dim_unit u ON u.id = f.unit_id;
@@ -0,0 +1,42 @@
+-- Migration: Natural key for usda_observations
+-- Description: Adds reference_period_desc and a unique key on
+-- (year, state, commodity, statistic, unit, reference period) so the
+-- load step can upsert with INSERT ... ON DUPLICATE KEY UPDATE.
+
+USE usda_etl_pipeline;
+
+ALTER TABLE usda_observations
+    ADD COLUMN reference_period_desc VARCHAR(40) NOT NULL DEFAULT '' AFTER unit_desc;
+
+-- Keep only the most recent row for each natural key
+DELETE older
+FROM usda_observations older
+JOIN usda_observations newer
+  ON newer.year = older.year
+ AND newer.state_name = older.state_name
+ AND newer.commodity_desc = older.commodity_desc
+ AND newer.statisticcat_desc = older.statisticcat_desc
+ AND newer.unit_desc = older.unit_desc
+ AND newer.reference_period_desc = older.reference_period_desc
+ AND newer.id > older.id;
+
+-- NULLs never collide in a unique key, so key columns must be NOT NULL
+DELETE FROM usda_observations
+WHERE year IS NULL
+   OR state_name IS NULL
+   OR commodity_desc IS NULL
+   OR statisticcat_desc IS NULL
+   OR unit_desc IS NULL;
+
+ALTER TABLE usda_observations
+    MODIFY year INT NOT NULL,
+    MODIFY state_name VARCHAR(100) NOT NULL,
+    MODIFY commodity_desc VARCHAR(100) NOT NULL,
+    MODIFY statisticcat_desc VARCHAR(100) NOT NULL,
+    MODIFY unit_desc VARCHAR(100) NOT NULL,
+    ADD UNIQUE KEY uq_observation (
+        year, state_name, commodity_desc, statisticcat_desc, unit_desc, reference_period_desc
+    );
+
+-- Note: rows loaded before this migration carry an empty reference period.
+-- Run `python src/run_etl.py --full-refresh` once to reload them with periods.
@@ -0,0 +1,42 @@
+-- Migration: Series discriminators and revisions
+-- Description: Quick Stats publishes several rows with the same
+-- year/state/commodity/statistic/unit/reference period: different
+-- frequencies, sub-series (e.g. WHEAT vs WHEAT, WINTER) and revised
+-- estimates. freq_desc and short_desc join the natural key; load_time
+-- records the revision, and the ETL only overwrites a row with a value
+-- from the same or a newer revision.
+-- Existing rows keep '' / NULL until the next full refresh
+-- (python src/run_etl.py --full-refresh).
+-- Requires migration_add_dimensions_and_indexes.sql.
+
+USE usda_etl_pipeline;
+
+ALTER TABLE usda_facts
+    ADD COLUMN freq_desc VARCHAR(20) NOT NULL DEFAULT '' AFTER reference_period_desc,
+    ADD COLUMN short_desc VARCHAR(255) NOT NULL DEFAULT '' AFTER freq_desc,
+    ADD COLUMN load_time DATETIME DEFAULT NULL AFTER short_desc,
+    DROP INDEX uq_observation,
+    ADD UNIQUE KEY uq_observation (
+        year, state_id, commodity_id, statistic_id, unit_id,
+        reference_period_desc, freq_desc, short_desc
+    );
+
+CREATE OR REPLACE VIEW usda_observations AS
+SELECT
+    f.id,
+    f.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    f.reference_period_desc,
+    f.freq_desc,
+    f.short_desc,
+    f.load_time,
+    f.value,
+    f.updated_at
+FROM usda_facts f
+JOIN dim_state s ON s.id = f.state_id
+JOIN dim_commodity c ON c.id = f.commodity_id
+JOIN dim_statistic st ON st.id = f.statistic_id
+JOIN dim_unit u ON u.id = f.unit_id;
@@ -0,0 +1,52 @@
+-- Migration: Reference period in the summary grain
+-- Description: usda_summary rows were keyed on statistic × year × state ×
+-- commodity × unit, so each summed every reference period of a statistic
+-- (the final YEAR figure with its YEAR - <month> FORECAST rows, monthly
+-- prices with MARKETING YEAR). The reference period joins the primary key
+-- and the API filters it to the statistic's annual figure. latest_period,
+-- now the period itself, is dropped. The table is rebuilt from usda_facts.
+-- Requires migration_add_foreign_keys.sql.
+
+USE usda_etl_pipeline;
+
+DELETE FROM usda_summary;
+
+-- One statement: the statistic_id foreign key keeps the primary key prefix
+ALTER TABLE usda_summary
+    DROP COLUMN latest_period,
+    ADD COLUMN reference_period_desc VARCHAR(40) NOT NULL DEFAULT '' AFTER unit_id,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (statistic_id, year, state_id, commodity_id, unit_id, reference_period_desc);
+
+INSERT INTO usda_summary (
+    statistic_id, year, state_id, commodity_id, unit_id, reference_period_desc,
+    obs_count, value_count, value_sum, value_mean, value_min, value_max
+)
+SELECT
+    statistic_id, year, state_id, commodity_id, unit_id, reference_period_desc,
+    COUNT(*), COUNT(value), SUM(value), AVG(value), MIN(value), MAX(value)
+FROM usda_facts
+GROUP BY statistic_id, year, state_id, commodity_id, unit_id, reference_period_desc;
+
+CREATE OR REPLACE VIEW usda_summary_view AS
+SELECT
+    m.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    m.reference_period_desc,
+    m.obs_count,
+    m.value_count,
+    m.value_sum,
+    m.value_mean,
+    m.value_min,
+    m.value_max
+FROM usda_summary m
+JOIN dim_state s ON s.id = m.state_id
+JOIN dim_commodity c ON c.id = m.commodity_id
+JOIN dim_statistic st ON st.id = m.statistic_id
+JOIN dim_unit u ON u.id = m.unit_id;
+
+-- Cached API responses and dashboard results predate the rebuild
+UPDATE etl_data_version SET version = version + 1 WHERE id = 1;
@@ -0,0 +1,62 @@
+-- Migration: Precomputed summaries
+-- Description: usda_summary holds, per statistic × year × state × commodity
+-- × unit, the count, sum, mean, min, max and latest reference period of
+-- usda_facts. load.py refreshes only the (statistic, year) partitions touched
+-- by each load; the API summary endpoint reads it instead of scanning facts.
+-- Requires migration_add_dimensions_and_indexes.sql.
+
+USE usda_etl_pipeline;
+
+CREATE TABLE usda_summary (
+    statistic_id SMALLINT UNSIGNED NOT NULL,
+    year SMALLINT NOT NULL,
+    state_id SMALLINT UNSIGNED NOT NULL,
+    commodity_id SMALLINT UNSIGNED NOT NULL,
+    unit_id SMALLINT UNSIGNED NOT NULL,
+    obs_count INT NOT NULL,
+    value_count INT NOT NULL,
+    value_sum DOUBLE DEFAULT NULL,
+    value_mean DOUBLE DEFAULT NULL,
+    value_min DOUBLE DEFAULT NULL,
+    value_max DOUBLE DEFAULT NULL,
+    latest_period VARCHAR(40) DEFAULT NULL,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (statistic_id, year, state_id, commodity_id, unit_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Initial build (later loads refresh touched partitions only)
+INSERT INTO usda_summary (
+    statistic_id, year, state_id, commodity_id, unit_id,
+    obs_count, value_count, value_sum, value_mean, value_min, value_max, latest_period
+)
+SELECT
+    statistic_id, year, state_id, commodity_id, unit_id,
+    COUNT(*), COUNT(value), SUM(value), AVG(value), MIN(value), MAX(value),
+    SUBSTRING_INDEX(GROUP_CONCAT(reference_period_desc ORDER BY FIELD(
+        reference_period_desc, 'YEAR', 'MARKETING YEAR',
+        'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+        'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'
+    ) DESC SEPARATOR '|'), '|', 1)
+FROM usda_facts
+GROUP BY statistic_id, year, state_id, commodity_id, unit_id;
+
+-- Summary rows with dimension names, mirroring usda_observations
+CREATE VIEW usda_summary_view AS
+SELECT
+    m.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    m.obs_count,
+    m.value_count,
+    m.value_sum,
+    m.value_mean,
+    m.value_min,
+    m.value_max,
+    m.latest_period
+FROM usda_summary m
+JOIN dim_state s ON s.id = m.state_id
+JOIN dim_commodity c ON c.id = m.commodity_id
+JOIN dim_statistic st ON st.id = m.statistic_id
+JOIN dim_unit u ON u.id = m.unit_id;
@@ -1,9 +1,66 @@
--- Migration: No-op
--- Description: The current database schema already contains the
--- finalized structure required by the ETL pipeline.
--- This migration file is intentionally left empty to keep
--- repository history consistent and avoid unintended changes.
+-- Migration: Normalized units and production value
+-- Description: the transform converts every value to a common unit
+-- ($ / TON, TONS, TONS / ACRE) with per-crop bushel weights, stored next to
+-- the published value as normalized_unit / normalized_value. The derive
+-- stage joins price received and production into an estimated production
+-- value per state, year and series, loaded into usda_production_value.
+-- Existing rows get their normalized columns on the next load
+-- (python src/run_etl.py --force).
+-- Requires migration_add_revision_columns.sql.
 
 USE usda_etl_pipeline;
 
--- No changes required.
+ALTER TABLE usda_facts
+    ADD COLUMN normalized_unit VARCHAR(20) NOT NULL DEFAULT '' AFTER value,
+    ADD COLUMN normalized_value DOUBLE DEFAULT NULL AFTER normalized_unit;
+
+CREATE OR REPLACE VIEW usda_observations AS
+SELECT
+    f.id,
+    f.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    f.reference_period_desc,
+    f.freq_desc,
+    f.short_desc,
+    f.load_time,
+    f.value,
+    f.normalized_unit,
+    f.normalized_value,
+    f.updated_at
+FROM usda_facts f
+JOIN dim_state s ON s.id = f.state_id
+JOIN dim_commodity c ON c.id = f.commodity_id
+JOIN dim_statistic st ON st.id = f.statistic_id
+JOIN dim_unit u ON u.id = f.unit_id;
+
+-- Table: usda_production_value (replaced by every load)
+CREATE TABLE usda_production_value (
+    year SMALLINT NOT NULL,
+    state_id SMALLINT UNSIGNED NOT NULL,
+    commodity_id SMALLINT UNSIGNED NOT NULL,
+    series VARCHAR(100) NOT NULL,
+    price_period VARCHAR(20) NOT NULL,
+    price_per_ton DOUBLE NOT NULL,
+    production_tons DOUBLE NOT NULL,
+    value_usd DOUBLE NOT NULL,
+    PRIMARY KEY (year, state_id, commodity_id, series),
+    KEY ix_production_value_commodity_year (commodity_id, year)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- View: usda_production_value_view (production value with dimension names)
+CREATE VIEW usda_production_value_view AS
+SELECT
+    p.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    p.series,
+    p.price_period,
+    p.price_per_ton,
+    p.production_tons,
+    p.value_usd
+FROM usda_production_value p
+JOIN dim_state s ON s.id = p.state_id
+JOIN dim_commodity c ON c.id = p.commodity_id;
@@ -3,22 +3,203 @@ CREATE DATABASE IF NOT EXISTS usda_etl_pipeline;
 USE usda_etl_pipeline;
 
 
--- Table: usda_observations
+DROP VIEW IF EXISTS usda_production_value_view;
+DROP VIEW IF EXISTS usda_summary_view;
+DROP VIEW IF EXISTS usda_observations;
+DROP TABLE IF EXISTS usda_production_value;
+DROP TABLE IF EXISTS usda_summary;
+DROP TABLE IF EXISTS etl_data_version;
 DROP TABLE IF EXISTS usda_observations;
+DROP TABLE IF EXISTS usda_facts;
+DROP TABLE IF EXISTS dim_state;
+DROP TABLE IF EXISTS dim_commodity;
+DROP TABLE IF EXISTS dim_statistic;
+DROP TABLE IF EXISTS dim_unit;
 
-CREATE TABLE usda_observations (
+
+-- Dimension tables: one row per distinct name, referenced by integer id
+CREATE TABLE dim_state (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_state_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE dim_commodity (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_commodity_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE dim_statistic (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_statistic_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE dim_unit (
+    id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_dim_unit_name (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- Table: usda_facts
+CREATE TABLE usda_facts (
     id INT NOT NULL AUTO_INCREMENT,
-    year INT DEFAULT NULL,
-    state_name VARCHAR(100) DEFAULT NULL,
-    commodity_desc VARCHAR(100) DEFAULT NULL,
-    statisticcat_desc VARCHAR(100) DEFAULT NULL,
-    unit_desc VARCHAR(100) DEFAULT NULL,
+    year SMALLINT NOT NULL,
+    state_id SMALLINT UNSIGNED NOT NULL,
+    commodity_id SMALLINT UNSIGNED NOT NULL,
+    statistic_id SMALLINT UNSIGNED NOT NULL,
+    unit_id SMALLINT UNSIGNED NOT NULL,
+    reference_period_desc VARCHAR(40) NOT NULL DEFAULT '',
+    freq_desc VARCHAR(20) NOT NULL DEFAULT '',
+    short_desc VARCHAR(255) NOT NULL DEFAULT '',
+    load_time DATETIME DEFAULT NULL,
     value FLOAT DEFAULT NULL,
+    normalized_unit VARCHAR(20) NOT NULL DEFAULT '',
+    normalized_value DOUBLE DEFAULT NULL,
     updated_at TIMESTAMP NULL DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_observation (
+        year, state_id, commodity_id, statistic_id, unit_id,
+        reference_period_desc, freq_desc, short_desc
+    ),
+    KEY ix_statistic_year_state (
+        statistic_id, year, state_id, commodity_id, unit_id, value
+    ),
+    KEY ix_statistic_commodity_year (statistic_id, commodity_id, year),
+    KEY ix_statistic_state_year (statistic_id, state_id, year),
+    -- Report pages: WHERE statistic = ? ORDER BY year DESC, state_id, id
+    KEY ix_statistic_year_desc_state (statistic_id, year DESC, state_id, id),
+    -- Unnamed, so RENAME TABLE renames them with the table (swap loads)
+    FOREIGN KEY (state_id) REFERENCES dim_state (id),
+    FOREIGN KEY (commodity_id) REFERENCES dim_commodity (id),
+    FOREIGN KEY (statistic_id) REFERENCES dim_statistic (id),
+    FOREIGN KEY (unit_id) REFERENCES dim_unit (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- View: usda_observations (denormalized, original column names)
+CREATE VIEW usda_observations AS
+SELECT
+    f.id,
+    f.year,
+    f.state_id,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    f.reference_period_desc,
+    f.freq_desc,
+    f.short_desc,
+    f.load_time,
+    f.value,
+    f.normalized_unit,
+    f.normalized_value,
+    f.updated_at
+FROM usda_facts f
+JOIN dim_state s ON s.id = f.state_id
+JOIN dim_commodity c ON c.id = f.commodity_id
+JOIN dim_statistic st ON st.id = f.statistic_id
+JOIN dim_unit u ON u.id = f.unit_id;
+
+
+-- Table: usda_summary (refreshed by load.py for the partitions it touches)
+CREATE TABLE usda_summary (
+    statistic_id SMALLINT UNSIGNED NOT NULL,
+    year SMALLINT NOT NULL,
+    state_id SMALLINT UNSIGNED NOT NULL,
+    commodity_id SMALLINT UNSIGNED NOT NULL,
+    unit_id SMALLINT UNSIGNED NOT NULL,
+    reference_period_desc VARCHAR(40) NOT NULL DEFAULT '',
+    obs_count INT NOT NULL,
+    value_count INT NOT NULL,
+    value_sum DOUBLE DEFAULT NULL,
+    value_mean DOUBLE DEFAULT NULL,
+    value_min DOUBLE DEFAULT NULL,
+    value_max DOUBLE DEFAULT NULL,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (statistic_id, year, state_id, commodity_id, unit_id, reference_period_desc),
+    FOREIGN KEY (state_id) REFERENCES dim_state (id),
+    FOREIGN KEY (commodity_id) REFERENCES dim_commodity (id),
+    FOREIGN KEY (statistic_id) REFERENCES dim_statistic (id),
+    FOREIGN KEY (unit_id) REFERENCES dim_unit (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- View: usda_summary_view (summary rows with dimension names)
+CREATE VIEW usda_summary_view AS
+SELECT
+    m.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    st.name AS statisticcat_desc,
+    u.name AS unit_desc,
+    m.reference_period_desc,
+    m.obs_count,
+    m.value_count,
+    m.value_sum,
+    m.value_mean,
+    m.value_min,
+    m.value_max
+FROM usda_summary m
+JOIN dim_state s ON s.id = m.state_id
+JOIN dim_commodity c ON c.id = m.commodity_id
+JOIN dim_statistic st ON st.id = m.statistic_id
+JOIN dim_unit u ON u.id = m.unit_id;
+
+
+-- Table: usda_production_value (price × production per state, year and
+-- series, derived by the ETL; replaced by every load)
+CREATE TABLE usda_production_value (
+    year SMALLINT NOT NULL,
+    state_id SMALLINT UNSIGNED NOT NULL,
+    commodity_id SMALLINT UNSIGNED NOT NULL,
+    series VARCHAR(100) NOT NULL,
+    price_period VARCHAR(20) NOT NULL,
+    price_per_ton DOUBLE NOT NULL,
+    production_tons DOUBLE NOT NULL,
+    value_usd DOUBLE NOT NULL,
+    PRIMARY KEY (year, state_id, commodity_id, series),
+    KEY ix_production_value_commodity_year (commodity_id, year),
+    FOREIGN KEY (state_id) REFERENCES dim_state (id),
+    FOREIGN KEY (commodity_id) REFERENCES dim_commodity (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- View: usda_production_value_view (production value with dimension names)
+CREATE VIEW usda_production_value_view AS
+SELECT
+    p.year,
+    s.name AS state_name,
+    c.name AS commodity_desc,
+    p.series,
+    p.price_period,
+    p.price_per_ton,
+    p.production_tons,
+    p.value_usd
+FROM usda_production_value p
+JOIN dim_state s ON s.id = p.state_id
+JOIN dim_commodity c ON c.id = p.commodity_id;
+
+
+-- Table: etl_data_version (bumped by every load; drives API cache invalidation)
+CREATE TABLE etl_data_version (
+    id TINYINT UNSIGNED NOT NULL,
+    version BIGINT UNSIGNED NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     PRIMARY KEY (id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+INSERT INTO etl_data_version (id, version) VALUES (1, 1);
+
 
 -- Notes:
 -- - This schema reflects the actual structure currently used
---   by the ETL pipeline and the MySQL database.
\ No newline at end of file
+--   by the ETL pipeline and the MySQL database.
+-- - The ETL writes to usda_facts and refreshes usda_summary; the API and
+--   ad-hoc queries read the usda_observations / usda_summary_view views.
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from .db import fetch_mappings
+
+# Response cache settings (overridable from config/.env)
+CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("API_CACHE_TTL_SECONDS", "86400"))
+# How long the data version read from etl_data_version is trusted
+VERSION_CHECK_SECONDS = float(os.getenv("API_CACHE_VERSION_CHECK_SECONDS", "5"))
+
+
+class CacheBackend(ABC):
+    """
+    Interface for response cache backends storing pre-serialized bytes.
+    Implement get/set/clear to plug in a shared cache (e.g. Redis).
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Cached bytes for key, or None."""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Store bytes under key."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry."""
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+
+            expires, value = item
+            if expires < monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+backend = LRUCache()
+_version = {"value": None, "checked": 0.0}
+
+
+def set_backend(new_backend):
+    """Replace the cache backend (a CacheBackend)."""
+    if not isinstance(new_backend, CacheBackend):
+        raise TypeError(f"Cache backends must subclass CacheBackend, got {type(new_backend).__name__}")
+    global backend
+    backend = new_backend
+
+
+async def current_data_version():
+    """
+    Data version stamped by the ETL load step, re-read at most every
+    VERSION_CHECK_SECONDS. Falls back to "0" when the table is missing.
+    """
+    now = monotonic()
+    if _version["value"] is None or now - _version["checked"] > VERSION_CHECK_SECONDS:
+        try:
+            rows = await fetch_mappings(text("SELECT version FROM etl_data_version WHERE id = 1"))
+            _version["value"] = str(rows[0]["version"]) if rows else "0"
+        except Exception:
+            _version["value"] = "0"
+        _version["checked"] = now
+
+    return _version["value"]
+
+
+def cache_key(request: Request):
+    """Route path plus query parameters in a normalized (sorted) order."""
+    params = sorted((k.lower(), v) for k, v in request.query_params.multi_items())
+    return request.url.path.rstrip("/") + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+
+async def cached_json(request: Request, produce):
+    """
+    Serve a JSON payload through the response cache.
+    `produce` is an async callable returning the payload on a cache miss.
+    The ETag is derived from the data version and the normalized request, so
+    a matching If-None-Match gets a 304 without running any query.
+    """
+    version = await current_data_version()
+    key = f"{version}|{cache_key(request)}"
+    etag = '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    body = backend.get(key)
+    if body is None:
+        body = json.dumps(jsonable_encoder(await produce())).encode()
+        backend.set(key, body)
+
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,32 +1,115 @@
 import os
 from pathlib import Path
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
+from .metrics import QUERY_SECONDS
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 ENV_PATH = BASE_DIR / "config" / ".env"
 
 load_dotenv(ENV_PATH)
 
+# DB_BACKEND=duckdb serves every query from an embedded DuckDB copy of the
+# processed Parquet output (see src/duckdb_store.py) instead of MySQL
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+if DB_BACKEND not in ("mysql", "duckdb"):
+    raise ValueError(f"Unknown DB_BACKEND: {DB_BACKEND}")
+
 MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_HOST = os.getenv("MYSQL_HOST")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 
-if not all([MYSQL_USER, MYSQL_PASSWORD, MYSQL_HOST, MYSQL_DATABASE]):
+if DB_BACKEND == "mysql" and not all([MYSQL_USER, MYSQL_PASSWORD, MYSQL_HOST, MYSQL_DATABASE]):
     raise ValueError("Missing database variables in .env")
 
+# Connection pool settings (overridable from config/.env)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# DB_ASYNC=true serves queries through an async driver (aiomysql or asyncmy)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
+
 MYSQL_URI = (
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}"
 )
 
-engine = create_engine(MYSQL_URI)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+engine = None
+async_engine = None
+store = None
+
+if DB_BACKEND == "duckdb":
+    # Imported here: only the DuckDB backend needs duckdb installed
+    from src.duckdb_store import PROCESSED_PATH, DuckDBStore
+
+    # Relative paths are resolved against the repository root
+    store = DuckDBStore(BASE_DIR / PROCESSED_PATH)
+else:
+    engine = create_engine(MYSQL_URI, **POOL_OPTIONS)
+
+if DB_ASYNC and engine is not None:
+    # Imported here: the asyncio extension needs greenlet and an async driver
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    ASYNC_MYSQL_URI = (
+        f"mysql+{DB_ASYNC_DRIVER}://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}"
+    )
+    async_engine = create_async_engine(ASYNC_MYSQL_URI, **POOL_OPTIONS)
+
+def _fetch_mappings(query, params):
+    with engine.connect() as conn:
+        return conn.execute(query, params).mappings().all()
+
+async def fetch_mappings(query, params=None):
+    """
+    Run a read query and return its rows as mappings.
+    Uses the async engine when DB_ASYNC is enabled; otherwise the sync engine
+    (or the DuckDB store) runs in the threadpool so async route handlers never
+    block the event loop.
+    """
+    with QUERY_SECONDS.labels("fetch").time():
+        if store is not None:
+            return await run_in_threadpool(store.fetch_mappings, query, params or {})
+
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                result = await conn.execute(query, params or {})
+                return result.mappings().all()
+
+        return await run_in_threadpool(_fetch_mappings, query, params or {})
+
+def pool_status(eng):
+    """Pool usage counters for the health route."""
+    pool = eng.pool
+    if not hasattr(pool, "checkedout"):
+        return {"class": type(pool).__name__}
+
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+    }
+
+def database_status():
+    if store is not None:
+        return {"backend": DB_BACKEND, "duckdb": store.status()}
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    status = {"backend": DB_BACKEND, "async": DB_ASYNC, "pool": pool_status(engine)}
+    if async_engine is not None:
+        status["async_pool"] = pool_status(async_engine.sync_engine)
+    return status
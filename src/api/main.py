@@ -1,5 +1,6 @@
 from fastapi import FastAPI
-from src.api.routes import price, production, yield_report, health
+from src.api.routes import price, production, yield_report, health, export, summary, metrics, production_value
+from src.api.metrics import track_requests
 
 app = FastAPI(
     title="USDA ETL API",
@@ -7,14 +8,29 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Request latency histograms, exported by /metrics
+app.middleware("http")(track_requests)
+
 # Register report routes
 app.include_router(price.router, prefix="/reports/price", tags=["Price"])
 app.include_router(production.router, prefix="/reports/production", tags=["Production"])
 app.include_router(yield_report.router, prefix="/reports/yield", tags=["Yield"])
 
+# Price × production per state and year, precomputed by the ETL
+app.include_router(production_value.router, prefix="/reports/production-value", tags=["Production value"])
+
+# Server-side aggregations: /reports/{price|production|yield}/summary
+app.include_router(summary.router, prefix="/reports", tags=["Summary"])
+
+# Streaming exports (NDJSON / CSV / Arrow)
+app.include_router(export.router, prefix="/export", tags=["Export"])
+
 # Healthcheck
 app.include_router(health.router, prefix="/health", tags=["Health"])
 
+# Prometheus metrics
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
+
 @app.get("/", tags=["Root"])
 def root():
     return {"message": "Welcome to the USDA ETL API"}
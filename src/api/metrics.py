@@ -0,0 +1,44 @@
+import time
+from fastapi import Request
+from prometheus_client import Histogram
+
+# API instrumentation, exported by GET /metrics. Routes are labelled by their
+# template (/reports/{statistic}/summary), never by the raw URL.
+REQUEST_SECONDS = Histogram(
+    "usda_api_request_seconds", "API request latency (until the response headers)",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERY_SECONDS = Histogram(
+    "usda_api_query_seconds", "Database time per query (streams: until the last batch)",
+    ["kind"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+def route_template(request: Request):
+    """
+    Matched route as a template (/reports/{statistic}/summary), so label
+    cardinality stays bounded; "unmatched" for 404s.
+    """
+    if request.scope.get("route") is None:
+        return "unmatched"
+
+    path = request.url.path
+    for name, value in request.path_params.items():
+        path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+    return path
+
+
+async def track_requests(request: Request, call_next):
+    """HTTP middleware observing REQUEST_SECONDS for every request."""
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        REQUEST_SECONDS.labels(
+            request.method, route_template(request), status
+        ).observe(time.perf_counter() - start)
@@ -0,0 +1,321 @@
+import base64
+import json
+from sqlalchemy import text
+from src.records import ANNUAL_PERIODS, DEFAULT_ANNUAL_PERIOD
+
+# Columns clients can request through `fields=`
+REPORT_FIELDS = [
+    "id",
+    "year",
+    "state_name",
+    "commodity_desc",
+    "statisticcat_desc",
+    "value",
+    "unit_desc",
+    "reference_period_desc",
+    "freq_desc",
+    "short_desc",
+    "load_time",
+    "normalized_unit",
+    "normalized_value",
+]
+DEFAULT_FIELDS = ["year", "state_name", "commodity_desc", "value", "unit_desc"]
+
+# Keyset pagination orders by (year DESC, state_id, id), the order of the
+# ix_statistic_year_desc_state index, so pages are read without a filesort;
+# these are always selected
+CURSOR_FIELDS = ["year", "state_id", "id"]
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+# Columns of usda_production_value_view (price × production, derived by the ETL)
+PRODUCTION_VALUE_FIELDS = [
+    "year",
+    "state_name",
+    "commodity_desc",
+    "series",
+    "price_period",
+    "price_per_ton",
+    "production_tons",
+    "value_usd",
+]
+
+# URL slug → statisticcat_desc
+STATISTICS = {
+    "price": "PRICE RECEIVED",
+    "production": "PRODUCTION",
+    "yield": "YIELD",
+}
+
+# Summary dimensions (group_by=) and aggregates (agg=)
+GROUP_COLUMNS = {
+    "year": "year",
+    "state": "state_name",
+    "commodity": "commodity_desc",
+}
+AGGREGATES = {
+    "mean": "AVG(value)",
+    "sum": "SUM(value)",
+    "count": "COUNT(*)",
+    "min": "MIN(value)",
+    "max": "MAX(value)",
+}
+
+# The same aggregates re-derived from usda_summary_view, whose grain is
+# statistic × year × state × commodity × unit × reference period
+SUMMARY_AGGREGATES = {
+    "mean": "SUM(value_sum) / NULLIF(SUM(value_count), 0)",
+    "sum": "SUM(value_sum)",
+    "count": "SUM(obs_count)",
+    "min": "MIN(value_min)",
+    "max": "MAX(value_max)",
+}
+
+
+def parse_fields(fields, default=DEFAULT_FIELDS):
+    """
+    Parse a comma-separated `fields=` value into a list of columns.
+    Raises ValueError for unknown columns.
+    """
+    if not fields:
+        return list(default)
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in REPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}. Allowed: {REPORT_FIELDS}")
+
+    return requested
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing after `row`."""
+    payload = json.dumps([row["year"], row["state_id"], row["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError for malformed cursors."""
+    try:
+        year, state_id, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {"cursor_year": int(year), "cursor_state": int(state_id), "cursor_id": int(row_id)}
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def where_sql(clauses):
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def build_filters(
+    statistic,
+    state=None,
+    commodity=None,
+    year_from=None,
+    year_to=None,
+    unit=None
+):
+    """
+    WHERE clauses and bind parameters shared by report queries.
+    statistic=None matches every statistic category.
+    """
+    clauses = []
+    params = {}
+
+    if statistic:
+        clauses.append("statisticcat_desc = :statistic")
+        params["statistic"] = statistic
+
+    if state:
+        clauses.append("state_name = :state")
+        params["state"] = state.upper()
+    if commodity:
+        clauses.append("commodity_desc = :commodity")
+        params["commodity"] = commodity.upper()
+    if year_from is not None:
+        clauses.append("year >= :year_from")
+        params["year_from"] = year_from
+    if year_to is not None:
+        clauses.append("year <= :year_to")
+        params["year_to"] = year_to
+    if unit:
+        clauses.append("unit_desc = :unit")
+        params["unit"] = unit
+
+    return clauses, params
+
+
+def build_report_query(
+    statistic,
+    fields=None,
+    state=None,
+    commodity=None,
+    year_from=None,
+    year_to=None,
+    unit=None,
+    cursor=None,
+    limit=DEFAULT_LIMIT
+):
+    """
+    Build a paginated report query on usda_observations.
+    Filters, projection and the keyset condition are all pushed into SQL.
+    One extra row is fetched so the caller can tell whether a next page exists.
+    Returns (query, params).
+    """
+    fields = fields or DEFAULT_FIELDS
+    clauses, params = build_filters(statistic, state, commodity, year_from, year_to, unit)
+
+    if cursor:
+        params.update(decode_cursor(cursor))
+        clauses.append(
+            "(year < :cursor_year"
+            " OR (year = :cursor_year AND state_id > :cursor_state)"
+            " OR (year = :cursor_year AND state_id = :cursor_state AND id > :cursor_id))"
+        )
+
+    columns = list(dict.fromkeys(fields + CURSOR_FIELDS))
+    params["limit"] = limit + 1
+
+    query = text(f"""
+        SELECT {", ".join(columns)}
+        FROM usda_observations
+        {where_sql(clauses)}
+        ORDER BY year DESC, state_id, id
+        LIMIT :limit
+    """)
+    return query, params
+
+
+def build_export_query(
+    statistic=None,
+    fields=None,
+    state=None,
+    commodity=None,
+    year_from=None,
+    year_to=None,
+    unit=None
+):
+    """
+    Unpaginated variant of build_report_query for streaming exports.
+    Returns (query, params).
+    """
+    fields = fields or DEFAULT_FIELDS
+    clauses, params = build_filters(statistic, state, commodity, year_from, year_to, unit)
+
+    query = text(f"""
+        SELECT {", ".join(fields)}
+        FROM usda_observations
+        {where_sql(clauses)}
+        ORDER BY year DESC, state_id, id
+    """)
+    return query, params
+
+
+def build_production_value_query(
+    state=None,
+    commodity=None,
+    year_from=None,
+    year_to=None
+):
+    """
+    Estimated production value per state, year and series, precomputed
+    by the ETL from price received × production. Returns (query, params).
+    """
+    clauses, params = build_filters(None, state, commodity, year_from, year_to)
+
+    query = text(f"""
+        SELECT {", ".join(PRODUCTION_VALUE_FIELDS)}
+        FROM usda_production_value_view
+        {where_sql(clauses)}
+        ORDER BY year DESC, state_name, commodity_desc, series
+    """)
+    return query, params
+
+
+def parse_list(value, allowed, name):
+    """Parse a comma-separated parameter, validating every item."""
+    items = [v.strip().lower() for v in (value or "").split(",") if v.strip()]
+    unknown = [v for v in items if v not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {name}: {unknown}. Allowed: {list(allowed)}")
+    return list(dict.fromkeys(items))
+
+
+def build_summary_query(
+    statistic,
+    group_by,
+    aggs,
+    yoy=False,
+    state=None,
+    commodity=None,
+    year_from=None,
+    year_to=None,
+    unit=None,
+    use_summary=False
+):
+    """
+    GROUP BY query over usda_observations for one statistic, restricted to
+    its annual figure (records.ANNUAL_PERIODS) so forecasts and monthly
+    values are never aggregated with it.
+    With use_summary=True the aggregates are re-derived from the precomputed
+    usda_summary_view instead, when every requested aggregate is available there.
+    Groups are always split by unit_desc so different units are never mixed.
+    With yoy=True (requires "year" in group_by), each non-count aggregate gets
+    a <agg>_yoy_pct column: the % change against the same group one year
+    earlier, computed with a window function (NULL when that year is missing).
+    Returns (query, params).
+    """
+    if yoy and "year" not in group_by:
+        raise ValueError("yoy=true requires year in group_by")
+
+    clauses, params = build_filters(statistic, state, commodity, year_from, year_to, unit)
+    keys = [GROUP_COLUMNS[g] for g in group_by] + ["unit_desc"]
+
+    use_summary = use_summary and all(a in SUMMARY_AGGREGATES for a in aggs)
+    expressions = SUMMARY_AGGREGATES if use_summary else AGGREGATES
+    source = "usda_summary_view" if use_summary else "usda_observations"
+    clauses.append("reference_period_desc = :period")
+    params["period"] = ANNUAL_PERIODS.get(statistic, DEFAULT_ANNUAL_PERIOD)
+
+    select = keys + [f"{expressions[a]} AS {a}" for a in aggs]
+    grouped = f"""
+        SELECT {", ".join(select)}
+        FROM {source}
+        {where_sql(clauses)}
+        GROUP BY {", ".join(keys)}
+    """
+    order = ", ".join(keys)
+
+    if not yoy:
+        return text(f"{grouped} ORDER BY {order}"), params
+
+    partition = [k for k in keys if k != "year"]
+    deltas = [
+        f"CASE WHEN LAG(year) OVER w = year - 1 AND LAG({a}) OVER w <> 0 "
+        f"THEN ({a} - LAG({a}) OVER w) * 100.0 / LAG({a}) OVER w END AS {a}_yoy_pct"
+        for a in aggs if a != "count"
+    ]
+
+    query = text(f"""
+        SELECT g.*{"".join(", " + d for d in deltas)}
+        FROM ({grouped}) g
+        WINDOW w AS (PARTITION BY {", ".join(partition)} ORDER BY year)
+        ORDER BY {order}
+    """)
+    return query, params
+
+
+def paginate(rows, fields, limit):
+    """
+    Turn the rows of build_report_query into a response body:
+    {"count": <n>, "next_cursor": <cursor or None>, "data": [...]}
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "count": len(rows),
+        "next_cursor": encode_cursor(rows[-1]) if has_more else None,
+        "data": [{f: row[f] for f in fields} for row in rows],
+    }
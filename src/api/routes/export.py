@@ -0,0 +1,34 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from ..queries import REPORT_FIELDS, build_export_query, parse_fields
+from ..streaming import negotiate_format, streaming_response
+
+router = APIRouter()
+
+@router.get("/")
+async def export_observations(
+    request: Request,
+    statistic: Optional[str] = Query(None, description="statisticcat_desc, e.g. PRICE RECEIVED (default: all)"),
+    state: Optional[str] = Query(None),
+    commodity: Optional[str] = Query(None),
+    year_from: Optional[int] = Query(None),
+    year_to: Optional[int] = Query(None),
+    unit: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated columns (default: all)"),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv|arrow)$", description="ndjson (default), csv or arrow"),
+):
+    """
+    Streams every matching observation as NDJSON, CSV or Arrow IPC,
+    selected by format= or the Accept header.
+    """
+    fmt = negotiate_format(format, request.headers.get("accept")) or "ndjson"
+
+    try:
+        columns = parse_fields(fields, default=REPORT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query, params = build_export_query(
+        statistic.upper() if statistic else None, columns, state, commodity, year_from, year_to, unit
+    )
+    return streaming_response(query, params, columns, fmt)
@@ -1,7 +1,9 @@
 from fastapi import APIRouter
+from ..db import database_status
 
 router = APIRouter()
 
 @router.get("/")
 def health_check():
-    return {"status": "ok"}
+    """Liveness plus connection pool usage (size, checked in/out, overflow)."""
+    return {"status": "ok", "database": database_status()}
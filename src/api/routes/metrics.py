@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter()
+
+@router.get("")
+def metrics():
+    """Prometheus metrics: request latency and database query time."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
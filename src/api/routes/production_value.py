@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import APIRouter, Query, Request
+from ..cache import cached_json
+from ..db import fetch_mappings
+from ..queries import build_production_value_query
+
+router = APIRouter()
+
+@router.get("/")
+async def get_production_value(
+    request: Request,
+    state: Optional[str] = Query(None, description="State name, e.g. IOWA"),
+    commodity: Optional[str] = Query(None, description="Commodity, e.g. CORN"),
+    year_from: Optional[int] = Query(None, description="First year (inclusive)"),
+    year_to: Optional[int] = Query(None, description="Last year (inclusive)"),
+):
+    """
+    Estimated production value (price received × production, in $) per
+    state, year and series, newest year first. Prices and quantities are
+    in normalized units ($ / TON, TONS); price_period tells which price was
+    used (MARKETING YEAR, YEAR or MONTHLY MEAN).
+    Response: {"count": <n>, "data": [...]}
+    """
+    query, params = build_production_value_query(state, commodity, year_from, year_to)
+
+    async def produce():
+        rows = await fetch_mappings(query, params)
+        return {"count": len(rows), "data": [dict(r) for r in rows]}
+
+    return await cached_json(request, produce)
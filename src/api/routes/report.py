@@ -0,0 +1,65 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from ..cache import cached_json
+from ..db import fetch_mappings
+from ..queries import (
+    DEFAULT_LIMIT,
+    MAX_LIMIT,
+    build_export_query,
+    build_report_query,
+    paginate,
+    parse_fields,
+)
+from ..streaming import negotiate_format, streaming_response
+
+FORMAT_PATTERN = "^(json|ndjson|csv|arrow)$"
+
+
+def report_router(statistic):
+    """
+    Build the router for one statisticcat_desc report.
+    Response: {"count": <n>, "next_cursor": <cursor or null>, "data": [...]}
+    With format=ndjson|csv|arrow (or a matching Accept header) the whole
+    filtered result is streamed instead of paginated.
+    """
+    router = APIRouter()
+
+    @router.get("/", description=f"Records where statisticcat_desc = '{statistic}', newest year first.")
+    async def get_report(
+        request: Request,
+        state: Optional[str] = Query(None, description="State name, e.g. IOWA"),
+        commodity: Optional[str] = Query(None, description="Commodity, e.g. CORN"),
+        year_from: Optional[int] = Query(None, description="First year (inclusive)"),
+        year_to: Optional[int] = Query(None, description="Last year (inclusive)"),
+        unit: Optional[str] = Query(None, description="Unit, e.g. $ / BU"),
+        fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+        format: Optional[str] = Query(None, pattern=FORMAT_PATTERN, description="json, ndjson, csv or arrow")
+    ):
+        fmt = negotiate_format(format, request.headers.get("accept"))
+
+        try:
+            columns = parse_fields(fields)
+            if fmt:
+                query, params = build_export_query(
+                    statistic, columns, state, commodity, year_from, year_to, unit
+                )
+            else:
+                query, params = build_report_query(
+                    statistic, columns, state, commodity, year_from, year_to, unit, cursor, limit
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if fmt:
+            filename = statistic.lower().replace(" ", "_")
+            return streaming_response(query, params, columns, fmt, filename=filename)
+
+        async def produce():
+            rows = await fetch_mappings(query, params)
+            return paginate(rows, columns, limit)
+
+        return await cached_json(request, produce)
+
+    return router
@@ -0,0 +1,53 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from ..cache import cached_json
+from ..db import fetch_mappings
+from ..queries import AGGREGATES, GROUP_COLUMNS, STATISTICS, build_summary_query, parse_list
+
+router = APIRouter()
+
+# Read aggregates from the usda_summary table maintained by load.py
+USE_SUMMARY_TABLES = os.getenv("API_USE_SUMMARY_TABLES", "true").lower() in ("1", "true", "yes")
+
+@router.get("/{statistic}/summary")
+async def get_summary(
+    request: Request,
+    statistic: str,
+    group_by: str = Query("year", description="Comma-separated: year, state, commodity"),
+    agg: str = Query("mean", description="Comma-separated: mean, sum, count, min, max"),
+    yoy: bool = Query(False, description="Add year-over-year % change per aggregate"),
+    state: Optional[str] = Query(None),
+    commodity: Optional[str] = Query(None),
+    year_from: Optional[int] = Query(None),
+    year_to: Optional[int] = Query(None),
+    unit: Optional[str] = Query(None),
+):
+    """
+    Aggregates computed in SQL, e.g.
+    /reports/price/summary?group_by=year,commodity&agg=mean&yoy=true
+    Response: {"statistic": ..., "group_by": [...], "count": <n>, "data": [...]}
+    """
+    if statistic not in STATISTICS:
+        raise HTTPException(status_code=404, detail=f"Unknown statistic. Allowed: {list(STATISTICS)}")
+
+    try:
+        groups = parse_list(group_by, GROUP_COLUMNS, "group_by")
+        aggs = parse_list(agg, AGGREGATES, "agg") or ["mean"]
+        query, params = build_summary_query(
+            STATISTICS[statistic], groups, aggs, yoy, state, commodity, year_from, year_to, unit,
+            use_summary=USE_SUMMARY_TABLES
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def produce():
+        rows = await fetch_mappings(query, params)
+        return {
+            "statistic": STATISTICS[statistic],
+            "group_by": groups,
+            "count": len(rows),
+            "data": [dict(r) for r in rows],
+        }
+
+    return await cached_json(request, produce)
@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+import pyarrow as pa
+from fastapi.responses import StreamingResponse
+from . import db
+from .metrics import QUERY_SECONDS
+
+# format= value → media type; the same media types are matched in Accept
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+EXTENSIONS = {"ndjson": "ndjson", "csv": "csv", "arrow": "arrow"}
+
+# Rows fetched from the server-side cursor per batch
+STREAM_BATCH_ROWS = 5000
+
+ARROW_TYPES = {
+    "id": pa.int64(),
+    "year": pa.int32(),
+    "state_name": pa.string(),
+    "commodity_desc": pa.string(),
+    "statisticcat_desc": pa.string(),
+    "value": pa.float64(),
+    "unit_desc": pa.string(),
+    "reference_period_desc": pa.string(),
+    "freq_desc": pa.string(),
+    "short_desc": pa.string(),
+    "load_time": pa.timestamp("s"),
+    "normalized_unit": pa.string(),
+    "normalized_value": pa.float64(),
+}
+
+
+def negotiate_format(format_param=None, accept=None):
+    """
+    Pick the streaming format from format= or the Accept header.
+    Returns None for a regular (paginated JSON) response.
+    """
+    if format_param:
+        return None if format_param == "json" else format_param
+
+    for fmt, media_type in MEDIA_TYPES.items():
+        if accept and media_type in accept:
+            return fmt
+
+    return None
+
+
+def iter_batches(query, params):
+    """Yield lists of row mappings from a server-side (unbuffered) cursor."""
+    if db.store is not None:
+        with QUERY_SECONDS.labels("stream").time():
+            yield from db.store.iter_batches(query, params, STREAM_BATCH_ROWS)
+        return
+
+    with QUERY_SECONDS.labels("stream").time(), db.engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=STREAM_BATCH_ROWS
+        ).execute(query, params)
+
+        for batch in result.mappings().partitions():
+            yield batch
+
+
+async def aiter_batches(query, params):
+    """Async variant of iter_batches for the async engine."""
+    with QUERY_SECONDS.labels("stream").time():
+        async with db.async_engine.connect() as conn:
+            result = await conn.stream(query, params)
+
+            async for batch in result.mappings().partitions(STREAM_BATCH_ROWS):
+                yield batch
+
+
+def json_default(value):
+    """Datetimes (load_time) as ISO 8601, like the paginated JSON responses."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class NdjsonEncoder:
+    def __init__(self, fields):
+        self.fields = fields
+
+    def start(self):
+        return b""
+
+    def encode(self, batch):
+        return "".join(
+            json.dumps({f: row[f] for f in self.fields}, default=json_default) + "\n"
+            for row in batch
+        ).encode()
+
+    def finish(self):
+        return b""
+
+
+class CsvEncoder:
+    def __init__(self, fields):
+        self.fields = fields
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator="\n")
+
+    def drain(self):
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def start(self):
+        self.writer.writerow(self.fields)
+        return self.drain()
+
+    def encode(self, batch):
+        self.writer.writerows([row[f] for f in self.fields] for row in batch)
+        return self.drain()
+
+    def finish(self):
+        return b""
+
+
+class ArrowEncoder:
+    def __init__(self, fields):
+        self.fields = fields
+        self.schema = pa.schema([(f, ARROW_TYPES[f]) for f in fields])
+        self.sink = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.sink, self.schema)
+
+    def drain(self):
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def start(self):
+        return self.drain()
+
+    def encode(self, batch):
+        columns = [[row[f] for row in batch] for f in self.fields]
+        self.writer.write_batch(pa.record_batch(columns, schema=self.schema))
+        return self.drain()
+
+    def finish(self):
+        self.writer.close()
+        return self.drain()
+
+
+ENCODERS = {"ndjson": NdjsonEncoder, "csv": CsvEncoder, "arrow": ArrowEncoder}
+
+
+def encode_stream(query, params, encoder):
+    yield encoder.start()
+    for batch in iter_batches(query, params):
+        yield encoder.encode(batch)
+    yield encoder.finish()
+
+
+async def aencode_stream(query, params, encoder):
+    yield encoder.start()
+    async for batch in aiter_batches(query, params):
+        yield encoder.encode(batch)
+    yield encoder.finish()
+
+
+def streaming_response(query, params, fields, fmt, filename="export"):
+    """
+    Stream the query result in the given format without buffering the full
+    result set: rows are fetched in batches from a server-side cursor and
+    encoded batch by batch.
+    """
+    encoder = ENCODERS[fmt](fields)
+    if db.async_engine is not None:
+        body = aencode_stream(query, params, encoder)
+    else:
+        body = encode_stream(query, params, encoder)
+
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{EXTENSIONS[fmt]}"'},
+    )
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from data import data_version, filter_options, yearly_series, main_unit, top_state, detail_rows, DETAIL_ROW_LIMIT
 
 
 # 📌 FORMATTER — Abreviar números grandes (K, M, B)
@@ -26,40 +27,21 @@ st.title("🌾 USDA Crop Analytics Dashboard")
 st.markdown("Analyze **Prices**, **Production**, and **Yield** from USDA agricultural data.")
 
 
-# 📥 LOAD DATA FROM CSV
-@st.cache_data
-def load_data():
-    csv_path = "data/processed/usda_processed.csv"
-    df = pd.read_csv(csv_path)
-
-    # Ensure correct dtypes
-    df["year"] = df["year"].astype(int)
-    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-
-    return df
-
-
-df = load_data()
+# 📥 DATA ACCESS — filters are pushed down to MySQL (see data.py)
+version = data_version()
+states, commodities, years = filter_options(version)
 
 
 # 🎛️ SIDEBAR FILTERS
 st.sidebar.header("🔍 Filters")
 
-states = sorted(df["state_name"].dropna().unique())
-commodities = sorted(df["commodity_desc"].dropna().unique())
-years = sorted(df["year"].dropna().unique())
-
 selected_state = st.sidebar.selectbox("State", ["All"] + states)
 selected_commodity = st.sidebar.selectbox("Commodity", ["All"] + commodities)
 selected_year = st.sidebar.selectbox("Year", ["All"] + [str(y) for y in years])
 
-filtered_df = df.copy()
-if selected_state != "All":
-    filtered_df = filtered_df[filtered_df["state_name"] == selected_state]
-if selected_commodity != "All":
-    filtered_df = filtered_df[filtered_df["commodity_desc"] == selected_commodity]
-if selected_year != "All":
-    filtered_df = filtered_df[filtered_df["year"] == int(selected_year)]
+state = None if selected_state == "All" else selected_state
+commodity = None if selected_commodity == "All" else selected_commodity
+year = None if selected_year == "All" else int(selected_year)
 
 
 # 📊 KPI SECTION
@@ -67,18 +49,21 @@ st.markdown("## 📊 Key Performance Indicators (KPIs)")
 col1, col2, col3 = st.columns(3)
 
 # ---- KPI DATA PREP ----
-price_df = filtered_df[filtered_df["statisticcat_desc"] == "PRICE RECEIVED"].sort_values("year")
-prod_df = filtered_df[filtered_df["statisticcat_desc"] == "PRODUCTION"]
-yield_df = filtered_df[filtered_df["statisticcat_desc"] == "YIELD"]
+price_df = yearly_series("PRICE RECEIVED", state, commodity, year, version)
+prod_df = yearly_series("PRODUCTION", state, commodity, year, version)
+yield_df = yearly_series("YIELD", state, commodity, year, version)
 
+# Mean price per year across the selected commodities, in their most common unit
+price_unit = main_unit(price_df)
+price_by_year = price_df[price_df["unit_desc"] == price_unit].groupby("year")[["total", "value_count"]].sum()
+price_by_year = price_by_year["total"] / price_by_year["value_count"].where(price_by_year["value_count"] > 0)
 
-# KPI 1 — YEAR-OVER-YEAR PRICE CHANGE
-if not price_df.empty and len(price_df["year"].unique()) >= 2:
-    latest_year = price_df["year"].max()
-    prev_year = latest_year - 1
 
-    latest_value = price_df[price_df["year"] == latest_year]["value"].mean()
-    prev_value = price_df[price_df["year"] == prev_year]["value"].mean()
+# KPI 1 — YEAR-OVER-YEAR PRICE CHANGE
+if len(price_by_year) >= 2:
+    latest_year = price_by_year.index.max()
+    latest_value = price_by_year.get(latest_year)
+    prev_value = price_by_year.get(latest_year - 1)
 
     if pd.notna(latest_value) and pd.notna(prev_value):
         yoy_change = ((latest_value - prev_value) / prev_value) * 100
@@ -95,29 +80,28 @@ with col1:
 
 
 # KPI 2 — LATEST PRICE
-if not price_df.empty:
-    latest_year = price_df["year"].max()
-    latest_price = price_df[price_df["year"] == latest_year]["value"].mean()
+if not price_by_year.empty and pd.notna(price_by_year.iloc[-1]):
+    latest_price = price_by_year.iloc[-1]
 else:
     latest_price = None
 
 with col2:
     st.metric(
-        label="💰 Latest Price",
+        label=f"💰 Latest Price ({price_unit})" if price_unit else "💰 Latest Price",
         value=f"{latest_price:.2f}" if latest_price is not None else "N/A"
     )
 
 
 # KPI 3 — TOP PRODUCING STATE (FORMATTED)
-if selected_state == "All":
-    prod_rank = prod_df.groupby("state_name")["value"].sum().sort_values(ascending=False)
+if state is None:
+    production_unit = main_unit(prod_df)
+    top = top_state("PRODUCTION", commodity, year, production_unit, version)
 
-    if not prod_rank.empty:
-        top_state = prod_rank.index[0]
-        top_value = prod_rank.iloc[0]
+    if top is not None:
+        top_name, top_value = top
         formatted_value = format_number(top_value)
 
-        kpi3_text = f"{top_state} — {formatted_value}"
+        kpi3_text = f"{top_name} — {formatted_value} {production_unit}"
     else:
         kpi3_text = "N/A"
 else:
@@ -136,8 +120,8 @@ if not price_df.empty:
     fig = px.area(
         price_df,
         x="year",
-        y="value",
-        color="commodity_desc",
+        y="mean",
+        color="series",
         title="Price Received Over Time (Stacked Area)"
     )
     st.plotly_chart(fig, use_container_width=True)
@@ -151,8 +135,8 @@ if not prod_df.empty:
     fig = px.bar(
         prod_df,
         x="year",
-        y="value",
-        color="commodity_desc",
+        y="total",
+        color="series",
         title="Production Volume by Year"
     )
     st.plotly_chart(fig, use_container_width=True)
@@ -166,8 +150,8 @@ if not yield_df.empty:
     fig = px.bar(
         yield_df,
         x="year",
-        y="value",
-        color="commodity_desc",
+        y="mean",
+        color="series",
         barmode="group",
         title="Yield by Year and Commodity"
     )
@@ -178,7 +162,8 @@ else:
 
 # 📄 RAW DATA TABLE
 st.subheader("🧾 Raw Filtered Data")
-st.dataframe(filtered_df, use_container_width=True)
+st.caption(f"Most recent {DETAIL_ROW_LIMIT:,} matching rows")
+st.dataframe(detail_rows(state, commodity, year, version), use_container_width=True)
 
 st.markdown("---")
-st.caption("USDA Data Dashboard — Streamlit + Plotly — CSV Version")
+st.caption("USDA Data Dashboard — Streamlit + Plotly — MySQL Version")
@@ -0,0 +1,168 @@
+import os
+import sys
+import pandas as pd
+import streamlit as st
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# src/ holds the modules shared with the ETL and the API
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from records import ANNUAL_PERIODS, DEFAULT_ANNUAL_PERIOD
+
+load_dotenv("config/.env")
+
+# mysql, or duckdb to query the processed Parquet output in-process
+# (see src/duckdb_store.py); defaults to the API's DB_BACKEND
+BACKEND = os.getenv("DASHBOARD_DB_BACKEND", os.getenv("DB_BACKEND", "mysql")).lower()
+
+MYSQL_USER = os.getenv("MYSQL_USER")
+MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
+MYSQL_HOST = os.getenv("MYSQL_HOST")
+MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
+
+# How often (seconds) the dashboard re-reads etl_data_version
+VERSION_TTL_SECONDS = int(os.getenv("DASHBOARD_VERSION_TTL_SECONDS", "30"))
+# Maximum rows shown in the raw data table
+DETAIL_ROW_LIMIT = int(os.getenv("DASHBOARD_DETAIL_ROW_LIMIT", "1000"))
+
+
+@st.cache_resource
+def get_engine():
+    if not all([MYSQL_USER, MYSQL_PASSWORD, MYSQL_HOST, MYSQL_DATABASE]):
+        raise ValueError("Missing MySQL environment variables in config/.env")
+
+    uri = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}"
+    return create_engine(uri, pool_pre_ping=True)
+
+
+@st.cache_resource
+def get_store():
+    from duckdb_store import DuckDBStore
+
+    return DuckDBStore()
+
+
+def read_sql(sql, params=None):
+    if BACKEND == "duckdb":
+        return get_store().fetch_df(sql, params)
+
+    with get_engine().connect() as conn:
+        return pd.read_sql(text(sql), conn, params=params or {})
+
+
+def build_filters(statistic=None, state=None, commodity=None, year=None, unit=None):
+    """
+    WHERE clause and bind parameters for the sidebar filters (None = All).
+    A statistic also restricts the rows to its annual figure (records.ANNUAL_PERIODS).
+    """
+    clauses = []
+    params = {}
+
+    if statistic:
+        clauses.append("statisticcat_desc = :statistic")
+        params["statistic"] = statistic
+        clauses.append("reference_period_desc = :period")
+        params["period"] = ANNUAL_PERIODS.get(statistic, DEFAULT_ANNUAL_PERIOD)
+    if state:
+        clauses.append("state_name = :state")
+        params["state"] = state
+    if commodity:
+        clauses.append("commodity_desc = :commodity")
+        params["commodity"] = commodity
+    if year is not None:
+        clauses.append("year = :year")
+        params["year"] = int(year)
+    if unit:
+        clauses.append("unit_desc = :unit")
+        params["unit"] = unit
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+@st.cache_data(ttl=VERSION_TTL_SECONDS)
+def data_version():
+    """Version stamped by every ETL load; part of every cache key below."""
+    try:
+        rows = read_sql("SELECT version FROM etl_data_version WHERE id = 1")
+        return int(rows["version"].iloc[0]) if not rows.empty else 0
+    except Exception:
+        return 0
+
+
+# The `version` argument is unused in the bodies: it only keys st.cache_data,
+# so a new ETL load invalidates every cached result.
+
+@st.cache_data
+def filter_options(version):
+    """Distinct states, commodities and years for the sidebar."""
+    df = read_sql("""
+        SELECT DISTINCT state_name, commodity_desc, year
+        FROM usda_summary_view
+    """)
+    return (
+        sorted(df["state_name"].dropna().unique()),
+        sorted(df["commodity_desc"].dropna().unique()),
+        sorted(int(y) for y in df["year"].dropna().unique()),
+    )
+
+
+@st.cache_data
+def yearly_series(statistic, state, commodity, year, version):
+    """
+    Per year × commodity × unit aggregates of the annual figures of one
+    statistic: total (sum), value_count and mean. Like the summary API,
+    results are split by unit so different units are never added.
+    """
+    where, params = build_filters(statistic, state, commodity, year)
+    df = read_sql(f"""
+        SELECT year, commodity_desc, unit_desc,
+               SUM(value) AS total,
+               COUNT(value) AS value_count
+        FROM usda_observations
+        {where}
+        GROUP BY year, commodity_desc, unit_desc
+        ORDER BY year, commodity_desc, unit_desc
+    """, params)
+    df["mean"] = df["total"] / df["value_count"].where(df["value_count"] > 0)
+    df["series"] = df["commodity_desc"] + " (" + df["unit_desc"] + ")"
+    return df
+
+
+def main_unit(df):
+    """Unit of a yearly_series frame with the most observations, or None."""
+    if df.empty:
+        return None
+    return df.groupby("unit_desc")["value_count"].sum().idxmax()
+
+
+@st.cache_data
+def top_state(statistic, commodity, year, unit, version):
+    """(state, total) with the largest summed annual value in `unit`, or None."""
+    where, params = build_filters(statistic, None, commodity, year, unit)
+    df = read_sql(f"""
+        SELECT state_name, SUM(value) AS total
+        FROM usda_observations
+        {where}
+        GROUP BY state_name
+        ORDER BY total DESC
+        LIMIT 1
+    """, params)
+    if df.empty or pd.isna(df["total"].iloc[0]):
+        return None
+    return df["state_name"].iloc[0], float(df["total"].iloc[0])
+
+
+@st.cache_data
+def detail_rows(state, commodity, year, version, limit=DETAIL_ROW_LIMIT):
+    """Most recent observations matching the filters, capped at `limit` rows."""
+    where, params = build_filters(None, state, commodity, year)
+    params["limit"] = limit
+    return read_sql(f"""
+        SELECT year, state_name, commodity_desc, statisticcat_desc,
+               value, unit_desc, reference_period_desc, short_desc
+        FROM usda_observations
+        {where}
+        ORDER BY year DESC, state_name, commodity_desc
+        LIMIT :limit
+    """, params)
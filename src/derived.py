@@ -0,0 +1,239 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from processed import PROCESSED_FOLDER, distinct_values, processed_files, read_processed
+
+# Derived series written by the derive stage and loaded into usda_production_value
+PRODUCTION_VALUE_PATH = os.path.join(PROCESSED_FOLDER, "production_value.parquet")
+
+TON_POUNDS = 2000  # short ton, as in Quick Stats "TONS"
+
+# Standard test weights (lb per bushel) used by USDA to convert bushels
+BUSHEL_POUNDS = {
+    "BARLEY": 48,
+    "CORN": 56,
+    "OATS": 32,
+    "RYE": 56,
+    "SORGHUM": 56,
+    "SOYBEANS": 60,
+    "WHEAT": 60,
+}
+
+# unit_desc → (normalized unit, exponent of lb per bushel, fixed factor):
+# normalized value = value × factor × (lb per bushel) ** exponent.
+# Bushel units need the commodity's weight; the others convert directly.
+UNIT_CONVERSIONS = {
+    "$ / BU": ("$ / TON", -1, TON_POUNDS),
+    "BU": ("TONS", 1, 1 / TON_POUNDS),
+    "BU / ACRE": ("TONS / ACRE", 1, 1 / TON_POUNDS),
+    "$ / CWT": ("$ / TON", 0, TON_POUNDS / 100),
+    "CWT": ("TONS", 0, 100 / TON_POUNDS),
+    "CWT / ACRE": ("TONS / ACRE", 0, 100 / TON_POUNDS),
+    "$ / LB": ("$ / TON", 0, TON_POUNDS),
+    "LB": ("TONS", 0, 1 / TON_POUNDS),
+    "LB / ACRE": ("TONS / ACRE", 0, 1 / TON_POUNDS),
+    "$ / TON": ("$ / TON", 0, 1),
+    "TONS": ("TONS", 0, 1),
+    "TONS / ACRE": ("TONS / ACRE", 0, 1),
+}
+# "" marks rows without a conversion (unknown unit or bushel weight)
+NORMALIZED_UNITS = sorted({unit for unit, _, _ in UNIT_CONVERSIONS.values()}) + [""]
+
+PRICE_STATISTIC = "PRICE RECEIVED"
+PRODUCTION_STATISTIC = "PRODUCTION"
+
+# Annual prices by preference; otherwise the mean of the monthly prices
+ANNUAL_PRICE_PERIODS = ["MARKETING YEAR", "YEAR"]
+MONTHLY_PRICE_PERIODS = [
+    "JAN", "FEB", "MAR", "APR", "MAY", "JUN",
+    "JUL", "AUG", "SEP", "OCT", "NOV", "DEC",
+]
+MONTHLY_MEAN = "MONTHLY MEAN"
+# Final annual production (forecasts are "YEAR - AUG FORECAST" etc.)
+PRODUCTION_PERIOD = "YEAR"
+
+# Price and production are aligned on these keys; series is the part of
+# short_desc before " - " (e.g. "CORN, GRAIN"), so classes never mix
+VALUE_KEYS = ["year", "state_name", "commodity_desc", "series"]
+PRODUCTION_VALUE_COLUMNS = VALUE_KEYS + [
+    "price_period",
+    "price_per_ton",
+    "production_tons",
+    "value_usd",
+]
+
+# Processed columns read by the derive stage
+DERIVE_COLUMNS = [
+    "year",
+    "state_name",
+    "commodity_desc",
+    "statisticcat_desc",
+    "reference_period_desc",
+    "short_desc",
+    "normalized_unit",
+    "normalized_value",
+]
+
+
+def lookup(values, mapping, default=np.nan, dtype="float64"):
+    """
+    mapping[value] for every row, computed once per category and gathered
+    by category code (missing values and unmapped categories get default).
+    """
+    values = values.astype("category")
+    table = np.array(
+        [mapping.get(c, default) for c in values.cat.categories] + [default],
+        dtype=dtype,
+    )
+    # code -1 (missing) picks the trailing default
+    return table[values.cat.codes.to_numpy()]
+
+
+def normalize_units(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add normalized_unit ($ / TON, TONS, TONS / ACRE) and normalized_value,
+    converted with UNIT_CONVERSIONS and each commodity's bushel weight.
+    Factors are computed per category and applied as array operations.
+    Rows without a conversion get normalized_unit "" and a null value.
+    Modifies df in place and returns it.
+    """
+    units = df["unit_desc"]
+    pounds = lookup(df["commodity_desc"], BUSHEL_POUNDS)
+    exponent = lookup(units, {u: c[1] for u, c in UNIT_CONVERSIONS.items()})
+    factor = lookup(units, {u: c[2] for u, c in UNIT_CONVERSIONS.items()})
+
+    # nan ** 0 == 1: weight-independent units convert without a bushel weight
+    with np.errstate(invalid="ignore"):
+        value = df["value"].to_numpy(dtype="float64") * factor * np.power(pounds, exponent)
+
+    codes = lookup(
+        units,
+        {u: NORMALIZED_UNITS.index(c[0]) for u, c in UNIT_CONVERSIONS.items()},
+        default=len(NORMALIZED_UNITS) - 1,
+        dtype="int64",
+    )
+    codes[np.isnan(value)] = len(NORMALIZED_UNITS) - 1
+
+    df["normalized_unit"] = pd.Categorical.from_codes(codes, categories=NORMALIZED_UNITS)
+    df["normalized_value"] = value
+    return df
+
+
+def series_of(df: pd.DataFrame) -> pd.Categorical:
+    """Series name (short_desc before " - "), or the commodity when short_desc is empty."""
+    short_desc = df["short_desc"].astype("category")
+    names = {c: c.split(" - ", 1)[0] for c in short_desc.cat.categories}
+    series = lookup(short_desc, names, default="", dtype=object)
+    commodity = df["commodity_desc"].to_numpy(dtype=object)
+    return pd.Categorical(np.where(series == "", commodity, series))
+
+
+def production_value(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Estimated production value per state, year and series: price received
+    ($ / TON) × production (TONS), joined on VALUE_KEYS.
+    The price is the annual one (MARKETING YEAR, then YEAR), or else the
+    mean of the monthly prices; production is the final annual figure.
+    Returns a DataFrame with PRODUCTION_VALUE_COLUMNS.
+    """
+    df = df.assign(series=series_of(df))
+    statistic = df["statisticcat_desc"]
+
+    price = df[(statistic == PRICE_STATISTIC) & (df["normalized_unit"] == "$ / TON")]
+    price = price.assign(price_per_ton=price["normalized_value"])
+
+    annual = price[price["reference_period_desc"].isin(ANNUAL_PRICE_PERIODS)]
+    rank = lookup(annual["reference_period_desc"], {p: i for i, p in enumerate(ANNUAL_PRICE_PERIODS)})
+    annual = (
+        annual.iloc[np.argsort(rank, kind="stable")]
+        .drop_duplicates(VALUE_KEYS)
+        .assign(price_period=lambda a: a["reference_period_desc"].astype(str))
+    )
+
+    monthly = (
+        price[price["reference_period_desc"].isin(MONTHLY_PRICE_PERIODS)]
+        .groupby(VALUE_KEYS, observed=True)["price_per_ton"]
+        .mean()
+        .reset_index()
+        .assign(price_period=MONTHLY_MEAN)
+    )
+
+    # Annual prices first: they win over the monthly mean for the same key
+    price_columns = VALUE_KEYS + ["price_period", "price_per_ton"]
+    prices = pd.concat([annual[price_columns], monthly[price_columns]], ignore_index=True)
+    prices = prices.drop_duplicates(VALUE_KEYS)
+
+    production = df[
+        (statistic == PRODUCTION_STATISTIC)
+        & (df["reference_period_desc"] == PRODUCTION_PERIOD)
+        & (df["normalized_unit"] == "TONS")
+    ]
+    production = (
+        production.assign(production_tons=production["normalized_value"])
+        [VALUE_KEYS + ["production_tons"]]
+        .drop_duplicates(VALUE_KEYS)
+    )
+
+    result = prices.merge(production, on=VALUE_KEYS, how="inner")
+    result["value_usd"] = result["price_per_ton"] * result["production_tons"]
+    result = result[PRODUCTION_VALUE_COLUMNS].sort_values(VALUE_KEYS, ignore_index=True)
+
+    for column in ["state_name", "commodity_desc", "series", "price_period"]:
+        result[column] = result[column].astype(str).astype("category")
+    return result
+
+
+def empty_production_value():
+    """Production value frame without rows, in the dtypes of build_production_value."""
+    dtypes = {"year": "int16", "price_per_ton": "float64", "production_tons": "float64", "value_usd": "float64"}
+    return pd.DataFrame({c: pd.Series(dtype=dtypes.get(c, "category")) for c in PRODUCTION_VALUE_COLUMNS})
+
+
+def build_production_value(output_path=PRODUCTION_VALUE_PATH):
+    """
+    Run production_value over the processed dataset one commodity at a
+    time, reading only its price and production partitions, so memory does
+    not grow with the size of the dataset.
+    Writes output_path (Parquet) and returns the result, empty when there
+    is no processed output.
+    """
+    statistics = [PRICE_STATISTIC, PRODUCTION_STATISTIC]
+    frames = []
+
+    commodities = []
+    if processed_files():
+        commodities = distinct_values("commodity_desc", statistic=statistics)
+    else:
+        print("[DERIVE] No processed output → empty production value")
+
+    for commodity in commodities:
+        df = read_processed(columns=DERIVE_COLUMNS, statistic=statistics, commodity=commodity)
+        values = production_value(df)
+        print(f"[DERIVE] {commodity} → {len(values)} production value rows")
+        if not values.empty:
+            frames.append(values)
+
+    if frames:
+        result = pd.concat(frames, ignore_index=True)
+        for column in ["state_name", "commodity_desc", "series", "price_period"]:
+            result[column] = result[column].astype(str).astype("category")
+        result["year"] = result["year"].astype("int16")
+    else:
+        result = empty_production_value()
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    result.to_parquet(output_path, index=False)
+
+    print(f"\n[SAVED] Production value → {len(result)} rows")
+    print(f"[PATH] {output_path}")
+    return result
+
+
+def read_production_value(path=PRODUCTION_VALUE_PATH):
+    return pd.read_parquet(path)
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Derive production value from the processed dataset").parse_args()
+    build_production_value()
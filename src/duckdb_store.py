@@ -0,0 +1,233 @@
+import hashlib
+import os
+import re
+import threading
+from time import monotonic
+import duckdb
+from dotenv import load_dotenv
+
+load_dotenv("config/.env")
+
+# Processed output served by the DuckDB backend: the partitioned Parquet
+# dataset (or the CSV written with USDA_PROCESSED_FORMAT=csv)
+PROCESSED_PATH = os.getenv("DUCKDB_PROCESSED_PATH", "data/processed/observations")
+# How often (seconds) the processed files are checked for a new ETL run
+REFRESH_SECONDS = float(os.getenv("DUCKDB_REFRESH_SECONDS", "5"))
+# DuckDB worker threads and memory cap (empty = DuckDB defaults)
+DUCKDB_THREADS = os.getenv("DUCKDB_THREADS", "")
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "")
+# Derived production value, written next to the processed output
+PRODUCTION_VALUE_FILE = "production_value.parquet"
+
+# Columns of the usda_observations view in sql/schema.sql
+OBSERVATION_COLUMNS = """
+    year::SMALLINT AS year,
+    state_name,
+    commodity_desc,
+    statisticcat_desc,
+    unit_desc,
+    COALESCE(reference_period_desc, '') AS reference_period_desc,
+    COALESCE(freq_desc, '') AS freq_desc,
+    COALESCE(short_desc, '') AS short_desc,
+    load_time,
+    value,
+    COALESCE(normalized_unit, '') AS normalized_unit,
+    normalized_value
+"""
+NATURAL_KEY = (
+    "year, state_name, commodity_desc, statisticcat_desc, unit_desc, "
+    "reference_period_desc, freq_desc, short_desc"
+)
+
+# Typed, empty stand-in while there is no processed output yet
+EMPTY_SOURCE = """(
+    SELECT NULL::BIGINT AS year, NULL::VARCHAR AS state_name,
+           NULL::VARCHAR AS commodity_desc, NULL::VARCHAR AS statisticcat_desc,
+           NULL::VARCHAR AS unit_desc, NULL::VARCHAR AS reference_period_desc,
+           NULL::VARCHAR AS freq_desc, NULL::VARCHAR AS short_desc,
+           NULL::TIMESTAMP AS load_time, NULL::DOUBLE AS value,
+           NULL::VARCHAR AS normalized_unit, NULL::DOUBLE AS normalized_value
+    WHERE false
+)"""
+
+# Columns of usda_production_value_view, and their stand-in
+PRODUCTION_VALUE_COLUMNS = """
+    year::SMALLINT AS year,
+    state_name::VARCHAR AS state_name,
+    commodity_desc::VARCHAR AS commodity_desc,
+    series::VARCHAR AS series,
+    price_period::VARCHAR AS price_period,
+    price_per_ton::DOUBLE AS price_per_ton,
+    production_tons::DOUBLE AS production_tons,
+    value_usd::DOUBLE AS value_usd
+"""
+EMPTY_PRODUCTION_VALUE = """(
+    SELECT NULL AS year, NULL AS state_name, NULL AS commodity_desc,
+           NULL AS series, NULL AS price_period, NULL AS price_per_ton,
+           NULL AS production_tons, NULL AS value_usd
+    WHERE false
+)"""
+
+# :name bind parameters (SQLAlchemy text()) → $name (DuckDB)
+BIND_PATTERN = re.compile(r"(?<![:\w]):(\w+)")
+
+
+def to_duckdb_sql(query, params):
+    """DuckDB SQL and the parameters it uses, from a text() query or a SQL string."""
+    sql = getattr(query, "text", query)
+    names = set(BIND_PATTERN.findall(sql))
+    return BIND_PATTERN.sub(r"$\1", sql), {k: v for k, v in (params or {}).items() if k in names}
+
+
+class DuckDBStore:
+    """
+    Embedded columnar copy of the processed output, exposing the relations
+    the API and dashboard query in MySQL: usda_observations,
+    usda_summary_view, usda_production_value_view and etl_data_version.
+    The same SQL runs on both.
+    The files are re-read when an ETL run rewrites them; the data version
+    is derived from their names, sizes and mtimes, so it changes with every
+    run and is stable across restarts. ids are row numbers in natural-key
+    order and state_ids rank state names; both are only stable while the
+    data is unchanged.
+    Queries run on per-thread cursors, so one store serves a threadpool.
+    """
+
+    def __init__(self, path=PROCESSED_PATH, refresh_seconds=REFRESH_SECONDS):
+        self.path = str(path)
+        self.production_value_path = os.path.join(
+            os.path.dirname(self.path.rstrip(os.sep)), PRODUCTION_VALUE_FILE
+        )
+        self.refresh_seconds = refresh_seconds
+        self.conn = duckdb.connect(":memory:")
+        if DUCKDB_THREADS:
+            self.conn.execute(f"SET threads = {int(DUCKDB_THREADS)}")
+        if DUCKDB_MEMORY_LIMIT:
+            self.conn.execute(f"SET memory_limit = '{DUCKDB_MEMORY_LIMIT}'")
+
+        self.lock = threading.Lock()
+        self.signature = None
+        self.checked = 0.0
+        self.rows = 0
+
+    def files(self):
+        if os.path.isfile(self.path):
+            return [self.path]
+
+        paths = []
+        for root, _, names in os.walk(self.path):
+            paths.extend(os.path.join(root, n) for n in names if n.endswith(".parquet"))
+        return sorted(paths)
+
+    def production_value_files(self):
+        return [self.production_value_path] if os.path.isfile(self.production_value_path) else []
+
+    def file_signature(self, files):
+        digest = hashlib.sha1()
+        for path in files:
+            stat = os.stat(path)
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def source_sql(self):
+        if os.path.isfile(self.path):
+            return f"read_csv('{self.path}', header = true)"
+        return f"read_parquet('{os.path.join(self.path, '**', '*.parquet')}', hive_partitioning = true)"
+
+    def refresh(self, force=False):
+        """Rebuild the tables if the processed files changed since the last build."""
+        if not force and monotonic() - self.checked < self.refresh_seconds:
+            return
+
+        with self.lock:
+            if not force and monotonic() - self.checked < self.refresh_seconds:
+                return
+
+            files = self.files()
+            signature = self.file_signature(files + self.production_value_files())
+            if force or signature != self.signature:
+                self.build(files, signature)
+            self.checked = monotonic()
+
+    def build(self, files, signature):
+        # Fits a signed BIGINT, like etl_data_version.version
+        version = int(signature[:15], 16)
+
+        source = f"SELECT {OBSERVATION_COLUMNS} FROM {self.source_sql() if files else EMPTY_SOURCE}"
+        production_value = (
+            f"read_parquet('{self.production_value_path}')"
+            if self.production_value_files() else EMPTY_PRODUCTION_VALUE
+        )
+
+        # One transaction: readers see either the old or the new tables
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN TRANSACTION")
+        try:
+            cursor.execute(f"""
+                CREATE OR REPLACE TABLE usda_observations AS
+                SELECT row_number() OVER (ORDER BY {NATURAL_KEY}) AS id,
+                       dense_rank() OVER (ORDER BY state_name)::SMALLINT AS state_id, *,
+                       NULL::TIMESTAMP AS updated_at
+                FROM ({source})
+                ORDER BY statisticcat_desc, year, state_name
+            """)
+            cursor.execute(f"""
+                CREATE OR REPLACE TABLE usda_summary_view AS
+                SELECT year, state_name, commodity_desc, statisticcat_desc, unit_desc,
+                       reference_period_desc,
+                       COUNT(*) AS obs_count,
+                       COUNT(value) AS value_count,
+                       SUM(value) AS value_sum,
+                       AVG(value) AS value_mean,
+                       MIN(value) AS value_min,
+                       MAX(value) AS value_max
+                FROM usda_observations
+                GROUP BY statisticcat_desc, year, state_name, commodity_desc, unit_desc,
+                         reference_period_desc
+            """)
+            cursor.execute(f"""
+                CREATE OR REPLACE TABLE usda_production_value_view AS
+                SELECT {PRODUCTION_VALUE_COLUMNS} FROM {production_value}
+            """)
+            cursor.execute(
+                "CREATE OR REPLACE TABLE etl_data_version AS "
+                "SELECT 1 AS id, $version::BIGINT AS version",
+                {"version": version},
+            )
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+        self.signature = signature
+        self.rows = cursor.execute("SELECT COUNT(*) FROM usda_observations").fetchone()[0]
+        print(f"[DUCKDB] Loaded {self.rows} rows from {len(files)} files in {self.path}")
+
+    def execute(self, query, params=None):
+        """Run a text() query (or SQL string with :name parameters) on a fresh cursor."""
+        self.refresh()
+        sql, params = to_duckdb_sql(query, params)
+        return self.conn.cursor().execute(sql, params)
+
+    def fetch_mappings(self, query, params=None):
+        """Rows as dicts, like SQLAlchemy's result.mappings().all()."""
+        result = self.execute(query, params)
+        columns = [c[0] for c in result.description]
+        return [dict(zip(columns, row)) for row in result.fetchall()]
+
+    def iter_batches(self, query, params=None, batch_rows=5000):
+        """Yield lists of row dicts, batch_rows at a time."""
+        result = self.execute(query, params)
+        columns = [c[0] for c in result.description]
+        while True:
+            rows = result.fetchmany(batch_rows)
+            if not rows:
+                return
+            yield [dict(zip(columns, row)) for row in rows]
+
+    def fetch_df(self, query, params=None):
+        """Result as a pandas DataFrame (dashboard)."""
+        return self.execute(query, params).df()
+
+    def status(self):
+        return {"path": self.path, "rows": self.rows, "signature": self.signature}
@@ -1,28 +1,417 @@
 import os
 import json
+import hashlib
+import threading
+import ijson
+import pandas as pd
 import requests
-from time import sleep
+from datetime import datetime, timedelta, timezone
+from time import monotonic, sleep
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+from records import AGG_LEVEL, normalize_observations, read_raw_file
+from metrics import FETCH_SECONDS, FETCH_ROWS, STAGE_BYTES
+from settings import COMMODITIES, STATES, METRICS, YEAR_FROM, YEAR_TO
 
 load_dotenv("config/.env")
 
 API_KEY = os.getenv("USDA_API_KEY")
-BASE_URL = "https://quickstats.nass.usda.gov/api/api_GET/"
+# Overridable to point the pipeline at a stand-in server (see bench/mock_server.py)
+BASE_URL = os.getenv("USDA_BASE_URL", "https://quickstats.nass.usda.gov/api/api_GET/")
 
-# Query parameters
-COMMODITIES = ["SOYBEANS", "CORN", "WHEAT"]
-STATES = ["IA", "IL", "MN", "NE", "SD"]
-METRICS = ["PRICE RECEIVED", "PRODUCTION", "YIELD"]
+# The query grid (COMMODITIES, STATES, METRICS, YEAR_FROM, YEAR_TO) is
+# defined in settings.py
 
-YEAR_FROM = 2020
-YEAR_TO = 2024
+# Concurrency settings (overridable from config/.env)
+MAX_WORKERS = int(os.getenv("USDA_MAX_WORKERS", "4"))
+REQUESTS_PER_SECOND = float(os.getenv("USDA_REQUESTS_PER_SECOND", "2"))
+MAX_RETRIES = int(os.getenv("USDA_MAX_RETRIES", "5"))
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
 
+# Query coalescing: Quick Stats rejects responses above 50k rows (HTTP 413)
+ROW_LIMIT = 50000
+ROW_LIMIT_STATUS = 413
+# Quick Stats answers a query without results with HTTP 400 and this error
+NO_DATA_STATUS = 400
+NO_DATA_ERROR = "no data"
 
-def fetch_usda_data(commodity, metric, state, year_from=YEAR_FROM, year_to=YEAR_TO):
+# Upper-bound estimate of rows per (commodity, metric, state, year).
+# PRICE RECEIVED is published monthly plus marketing-year averages.
+ESTIMATED_ROWS_PER_YEAR = {
+    "PRICE RECEIVED": 20,
+    "PRODUCTION": 6,
+    "YIELD": 6,
+}
+DEFAULT_ROWS_PER_YEAR = 20
+
+# Incremental extraction
+RAW_FOLDER = "data/raw"
+MANIFEST_PATH = os.path.join(RAW_FOLDER, "manifest.json")
+# The most recent years keep receiving revisions and are always re-fetched
+REFRESH_YEARS = int(os.getenv("USDA_REFRESH_YEARS", "2"))
+# Combinations fetched more recently than this are not requested again
+STALE_AFTER_HOURS = float(os.getenv("USDA_STALE_AFTER_HOURS", "12"))
+
+# Raw storage: responses are parsed incrementally and written as NDJSON
+# (one record per line) or Parquet, without holding the payload in memory
+RAW_FORMAT = os.getenv("USDA_RAW_FORMAT", "ndjson")
+RAW_EXTENSIONS = {"ndjson": ".ndjson", "parquet": ".parquet"}
+
+
+class RateLimiter:
     """
-    Fetch USDA QuickStats data for a specific commodity, metric, and state.
-    Saves normalized JSON under data/raw/, keeping only the keys needed
-    for the Transform step.
+    Thread-safe token bucket shared by all extraction workers.
+    Allows short bursts up to `burst` requests, then refills at `rate` per second.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            sleep(wait)
+
+
+def create_session(pool_size=MAX_WORKERS, max_retries=MAX_RETRIES):
+    """
+    Build a keep-alive session shared by all workers.
+    Retries 429/5xx responses with exponential backoff, honoring Retry-After.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=1,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def estimate_rows(batch, year_from=YEAR_FROM, year_to=YEAR_TO):
+    """Estimate how many rows the API returns for a batch of combinations."""
+    years = year_to - year_from + 1
+    rows_per_cell = sum(
+        ESTIMATED_ROWS_PER_YEAR.get(metric, DEFAULT_ROWS_PER_YEAR)
+        for metric in batch["metrics"]
+    )
+    return len(batch["commodities"]) * len(batch["states"]) * years * rows_per_cell
+
+
+def batch_size(batch):
+    """Number of commodity/metric/state combinations covered by a batch."""
+    return len(batch["commodities"]) * len(batch["metrics"]) * len(batch["states"])
+
+
+def split_batch(batch):
+    """Split a batch in two along its widest dimension."""
+    key = max(["states", "commodities", "metrics"], key=lambda k: len(batch[k]))
+    values = batch[key]
+    half = len(values) // 2
+    return [
+        {**batch, key: values[:half]},
+        {**batch, key: values[half:]},
+    ]
+
+
+def plan_requests(
+    commodities=COMMODITIES,
+    metrics=METRICS,
+    states=STATES,
+    year_from=YEAR_FROM,
+    year_to=YEAR_TO,
+    row_limit=ROW_LIMIT
+):
+    """
+    Group the commodity × metric × state grid into the fewest multi-valued
+    requests whose estimated size stays under the API row limit.
+    Each batch is a dict with "commodities", "metrics" and "states" lists.
+    """
+    pending = [{
+        "commodities": list(commodities),
+        "metrics": list(metrics),
+        "states": list(states),
+    }]
+    batches = []
+
+    while pending:
+        batch = pending.pop()
+        if batch_size(batch) == 1 or estimate_rows(batch, year_from, year_to) <= row_limit:
+            batches.append(batch)
+        else:
+            pending.extend(reversed(split_batch(batch)))
+
+    return batches
+
+
+def group_grid(combinations):
+    """
+    Regroup an arbitrary list of (commodity, metric, state) combinations into
+    rectangular commodity × metric × state blocks that cover exactly the same
+    combinations, so each block can be planned as a multi-valued request.
+    """
+    states_by_pair = {}
+    for commodity, metric, state in combinations:
+        states_by_pair.setdefault((commodity, metric), []).append(state)
+
+    commodities_by_key = {}
+    for (commodity, metric), states in states_by_pair.items():
+        commodities_by_key.setdefault((metric, tuple(states)), []).append(commodity)
+
+    metrics_by_key = {}
+    for (metric, states), commodities in commodities_by_key.items():
+        metrics_by_key.setdefault((tuple(commodities), states), []).append(metric)
+
+    return [
+        {"commodities": list(commodities), "metrics": metrics, "states": list(states)}
+        for (commodities, states), metrics in metrics_by_key.items()
+    ]
+
+
+class FetchManifest:
+    """
+    Persistent record of what has been extracted, stored in data/raw/manifest.json.
+    Per combination it keeps the year range fetched, a content hash, the row count
+    and the fetch timestamp; per request it keeps ETag/Last-Modified validators.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"combinations": {}, "requests": {}}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.data.update(json.load(f))
+            except Exception as e:
+                print(f"[WARNING] Could not read manifest {path}: {e} → full extraction")
+
+    @staticmethod
+    def key(commodity, metric, state):
+        return f"{commodity}|{metric}|{state}"
+
+    def get(self, commodity, metric, state):
+        with self.lock:
+            return self.data["combinations"].get(self.key(commodity, metric, state))
+
+    def update(self, commodity, metric, state, **fields):
+        with self.lock:
+            entry = self.data["combinations"].setdefault(self.key(commodity, metric, state), {})
+            entry.update(fields)
+
+    def validators(self, request_key):
+        with self.lock:
+            return dict(self.data["requests"].get(request_key, {}))
+
+    def set_validators(self, request_key, etag=None, last_modified=None):
+        validators = {k: v for k, v in [("etag", etag), ("last_modified", last_modified)] if v}
+        with self.lock:
+            if validators:
+                self.data["requests"][request_key] = validators
+            else:
+                self.data["requests"].pop(request_key, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.lock:
+            with open(self.path, "w") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+
+
+def fetch_window(entry, year_from=YEAR_FROM, year_to=YEAR_TO, now=None):
+    """
+    Decide which years of a combination need to be requested.
+    Returns (window_from, window_to), or None when the stored data is fresh.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    if not entry or entry.get("year_from", year_from) > year_from:
+        return year_from, year_to
+
+    fetched_at = datetime.fromisoformat(entry["fetched_at"])
+    if entry["year_to"] >= year_to and now - fetched_at < timedelta(hours=STALE_AFTER_HOURS):
+        return None
+
+    window_from = min(entry["year_to"] + 1, year_to - REFRESH_YEARS + 1)
+    return max(year_from, window_from), year_to
+
+
+def raw_filename(commodity, metric, state, raw_format=RAW_FORMAT):
+    """Name of the raw file holding one commodity/metric/state combination."""
+    return f"{commodity.lower()}_{state}_{metric.replace(' ', '_').lower()}{RAW_EXTENSIONS[raw_format]}"
+
+
+def raw_path(commodity, metric, state):
+    return os.path.join(RAW_FOLDER, raw_filename(commodity, metric, state))
+
+
+def project_row(row):
+    """
+    Keep only the keys needed for the Transform step; values stay as published.
+    Returns None for rows of another agg_level_desc than records.AGG_LEVEL.
+    """
+    level = row.get("agg_level_desc")
+    if level and level != AGG_LEVEL:
+        return None
+
+    return {
+        "year": row.get("year"),
+        "state_name": row.get("state_name"),
+        "commodity_desc": row.get("commodity_desc"),
+        "statisticcat_desc": row.get("statisticcat_desc"),
+        "unit_desc": row.get("unit_desc"),
+        "reference_period_desc": row.get("reference_period_desc"),
+        "freq_desc": row.get("freq_desc"),
+        "short_desc": row.get("short_desc"),
+        "load_time": row.get("load_time"),
+        "value": row.get("Value"),
+    }
+
+
+def frame_hash(df):
+    """Content hash of a DataFrame, independent of the storage format."""
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes()).hexdigest()
+
+
+def write_raw(df, path, raw_format=RAW_FORMAT):
+    if raw_format == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        # ISO timestamps so load_time reads back as a datetime, not epoch ms
+        df.to_json(path, orient="records", lines=True, date_format="iso")
+
+
+def save_raw(part_path, commodity, metric, state, year_from=YEAR_FROM, year_to=YEAR_TO, manifest=None):
+    """
+    Normalize freshly fetched records (an NDJSON part file) for one
+    combination and merge them into its raw file. Rows inside
+    [year_from, year_to] are replaced; older years are kept.
+    The file is only replaced when its content changed.
+    Returns the raw file path, or None when nothing valid is stored.
+    """
+    file_path = raw_path(commodity, metric, state)
+
+    try:
+        fresh, dropped = normalize_observations(read_raw_file(part_path, published_values=True))
+    finally:
+        os.remove(part_path)
+
+    if dropped:
+        print(f"Dropped rows for {commodity}-{metric}-{state}: {dropped}")
+
+    merged = fresh
+    if os.path.exists(file_path):
+        try:
+            existing, _ = normalize_observations(read_raw_file(file_path))
+            existing = existing[~existing["year"].between(year_from, year_to)]
+            merged = pd.concat([existing, fresh], ignore_index=True)
+        except Exception as e:
+            print(f"[WARNING] Could not merge into {file_path}: {e} → overwriting")
+
+    if merged.empty:
+        print(f"No valid numeric rows for {commodity}-{metric}-{state}")
+        return None
+
+    merged = merged.sort_values("year", kind="stable", ignore_index=True)
+    digest = frame_hash(merged)
+    entry = (manifest.get(commodity, metric, state) if manifest else None) or {}
+
+    if entry.get("content_hash") == digest and os.path.exists(file_path):
+        print(f"Unchanged {file_path} ({len(merged)} records)")
+    else:
+        tmp_path = file_path + ".tmp"
+        write_raw(merged, tmp_path)
+        os.replace(tmp_path, file_path)
+        print(f"Saved {len(merged)} normalized records → {file_path}")
+
+    if manifest:
+        manifest.update(
+            commodity, metric, state,
+            year_from=min(year_from, entry.get("year_from", year_from)),
+            year_to=max(year_to, entry.get("year_to", year_to)),
+            content_hash=digest,
+            row_count=len(merged),
+            dropped=dropped,
+            fetched_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    return file_path
+
+
+def touch_batch(batch, year_from, year_to, manifest):
+    """Mark every combination of a batch as freshly checked without new data."""
+    saved = {}
+    now = datetime.now(timezone.utc).isoformat()
+
+    for commodity in batch["commodities"]:
+        for metric in batch["metrics"]:
+            for state in batch["states"]:
+                file_path = raw_path(commodity, metric, state)
+                if not os.path.exists(file_path):
+                    continue
+
+                entry = manifest.get(commodity, metric, state) or {}
+                manifest.update(
+                    commodity, metric, state,
+                    year_from=min(year_from, entry.get("year_from", year_from)),
+                    year_to=max(year_to, entry.get("year_to", year_to)),
+                    fetched_at=now,
+                )
+                saved[(commodity, metric, state)] = file_path
+
+    return saved
+
+
+def is_no_data(response):
+    """True if a response is Quick Stats reporting an empty result."""
+    if response.status_code != NO_DATA_STATUS:
+        return False
+    try:
+        errors = response.json().get("error", [])
+    except ValueError:
+        return False
+    return any(NO_DATA_ERROR in str(e) for e in errors)
+
+
+def fetch_batch(
+    batch,
+    year_from=YEAR_FROM,
+    year_to=YEAR_TO,
+    session=None,
+    rate_limiter=None,
+    manifest=None
+):
+    """
+    Fetch a batch of combinations with one multi-valued Quick Stats request
+    and split the response back into one raw file per combination.
+    If the API rejects the batch for exceeding the row limit, it is split
+    and fetched again. With a manifest, the request is conditional on the
+    validators of the previous response and results are merged into the
+    existing raw files.
+    Returns a dict mapping (commodity, metric, state) → saved file path.
     """
 
     if not API_KEY:
@@ -33,88 +422,247 @@ def fetch_usda_data(commodity, metric, state, year_from=YEAR_FROM, year_to=YEAR_
         "source_desc": "SURVEY",
         "sector_desc": "CROPS",
         "group_desc": "FIELD CROPS",
-        "commodity_desc": commodity,
-        "statisticcat_desc": metric,
+        "commodity_desc": batch["commodities"],
+        "statisticcat_desc": batch["metrics"],
         "agg_level_desc": "STATE",
-        "state_alpha": state,
+        "state_alpha": batch["states"],
         "year__GE": year_from,
         "year__LE": year_to,
         "format": "JSON",
     }
+    label = "-".join(
+        ",".join(batch[k]) for k in ["commodities", "metrics", "states"]
+    )
+    request_key = f"{label}|{year_from}-{year_to}"
+
+    headers = {}
+    if manifest:
+        validators = manifest.validators(request_key)
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
 
-    print(f"→ Fetching {commodity} | {metric} | {state} ({year_from}-{year_to})...")
+    print(f"→ Fetching {label} ({year_from}-{year_to})...")
+
+    if rate_limiter:
+        rate_limiter.acquire()
+    # Latency excludes the rate limiter wait
+    started = monotonic()
 
     try:
-        response = requests.get(BASE_URL, params=params, timeout=20)
+        response = (session or requests).get(
+            BASE_URL, params=params, headers=headers, timeout=60, stream=True
+        )
+
+        if response.status_code == ROW_LIMIT_STATUS and batch_size(batch) > 1:
+            print(f"Row limit exceeded for {label} → splitting batch")
+            response.close()
+            FETCH_SECONDS.labels(str(response.status_code)).observe(monotonic() - started)
+            saved = {}
+            for part in split_batch(batch):
+                saved.update(fetch_batch(part, year_from, year_to, session, rate_limiter, manifest))
+            return saved
+
+        if response.status_code == 304 and manifest:
+            print(f"Not modified: {label}")
+            response.close()
+            FETCH_SECONDS.labels("304").observe(monotonic() - started)
+            return touch_batch(batch, year_from, year_to, manifest)
+
+        # Nothing published in the window: recorded like a 304, so the
+        # window is not requested again until it goes stale
+        if is_no_data(response):
+            print(f"No data for {label} ({year_from}-{year_to})")
+            response.close()
+            FETCH_SECONDS.labels(str(NO_DATA_STATUS)).observe(monotonic() - started)
+            return touch_batch(batch, year_from, year_to, manifest) if manifest else {}
+
         response.raise_for_status()
     except Exception as e:
-        print(f"Request error for {commodity}-{state}-{metric}: {e}")
-        return None
+        print(f"Request error for {label}: {e}")
+        FETCH_SECONDS.labels("error").observe(monotonic() - started)
+        return {}
+
+    # Stream the response and demultiplex rows into per-combination part files
+    os.makedirs(RAW_FOLDER, exist_ok=True)
+    wanted = {
+        (commodity, metric, state)
+        for commodity in batch["commodities"]
+        for metric in batch["metrics"]
+        for state in batch["states"]
+    }
+    parts = {}
+    row_counts = {}
 
     try:
-        raw_data = response.json().get("data", [])
+        response.raw.decode_content = True
+        for row in ijson.items(response.raw, "data.item", use_float=True):
+            key = (row.get("commodity_desc"), row.get("statisticcat_desc"), row.get("state_alpha"))
+            projected = project_row(row)
+            if key not in wanted or projected is None:
+                continue
+
+            if key not in parts:
+                parts[key] = open(raw_path(*key) + ".part", "w")
+                row_counts[key] = 0
+            parts[key].write(json.dumps(projected) + "\n")
+            row_counts[key] += 1
     except Exception as e:
-        print(f"JSON decode error for {commodity}-{state}-{metric}: {e}")
-        return None
+        print(f"JSON decode error for {label}: {e}")
+        for f in parts.values():
+            f.close()
+            os.remove(f.name)
+        FETCH_SECONDS.labels("decode_error").observe(monotonic() - started)
+        return {}
+    finally:
+        response.close()
 
-    if not raw_data:
-        print(f"No data found for {commodity}-{state}-{metric}")
-        return None
+    FETCH_SECONDS.labels(str(response.status_code)).observe(monotonic() - started)
+    STAGE_BYTES.labels("extract", "in").inc(response.raw.tell())
+    for (commodity, metric, _), count in row_counts.items():
+        FETCH_ROWS.labels(commodity, metric).inc(count)
 
-    os.makedirs("data/raw", exist_ok=True)
+    if manifest:
+        manifest.set_validators(
+            request_key,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
 
-    cleaned = []
-    for row in raw_data:
-        try:
-            value_clean = (
-                None if row.get("Value") in ["(D)", "(NA)", None]
-                else float(str(row.get("Value")).replace(",", ""))
-            )
-
-            cleaned.append({
-                "year": int(row.get("year")),
-                "state_name": row.get("state_name"),
-                "commodity_desc": row.get("commodity_desc"),
-                "statisticcat_desc": row.get("statisticcat_desc"),
-                "unit_desc": row.get("unit_desc"),
-                "value": value_clean,
-            })
-        except Exception:
-            continue
-
-    if not cleaned:
-        print(f"No valid numeric rows for {commodity}-{metric}-{state}")
-        return None
+    saved = {}
+    for commodity in batch["commodities"]:
+        for metric in batch["metrics"]:
+            for state in batch["states"]:
+                key = (commodity, metric, state)
 
-    filename = f"{commodity.lower()}_{state}_{metric.replace(' ', '_').lower()}_{year_from}_{year_to}.json"
-    file_path = os.path.join("data/raw", filename)
+                if key not in parts:
+                    print(f"No data found for {commodity}-{state}-{metric}")
+                    continue
 
-    with open(file_path, "w") as f:
-        json.dump(cleaned, f, indent=2)
+                parts[key].close()
+                file_path = save_raw(
+                    parts[key].name, commodity, metric, state, year_from, year_to, manifest
+                )
+                if file_path:
+                    saved[key] = file_path
 
-    print(f"Saved {len(cleaned)} normalized records → {file_path}")
-    return file_path
+    # Combinations with no new rows in the window keep their existing data
+    if manifest:
+        for combination, file_path in touch_batch(batch, year_from, year_to, manifest).items():
+            saved.setdefault(combination, file_path)
+
+    return saved
+
+
+def fetch_usda_data(
+    commodity,
+    metric,
+    state,
+    year_from=YEAR_FROM,
+    year_to=YEAR_TO,
+    session=None,
+    rate_limiter=None,
+    manifest=None
+):
+    """
+    Fetch USDA QuickStats data for a specific commodity, metric, and state.
+    Saves normalized records under data/raw/, keeping only the keys needed
+    for the Transform step.
+    Pass a shared `session` and `rate_limiter` when calling from several threads.
+    With a `manifest`, only the missing or stale years are requested.
+    """
+    window = (year_from, year_to)
+    if manifest:
+        entry = manifest.get(commodity, metric, state)
+        if not os.path.exists(raw_path(commodity, metric, state)):
+            entry = None
+
+        window = fetch_window(entry, year_from, year_to)
+        if window is None:
+            print(f"Up to date: {commodity}-{state}-{metric}")
+            return raw_path(commodity, metric, state)
+
+    batch = {"commodities": [commodity], "metrics": [metric], "states": [state]}
+    saved = fetch_batch(batch, window[0], window[1], session, rate_limiter, manifest)
+    return saved.get((commodity, metric, state))
+
+
+def fetch_all(
+    max_workers=MAX_WORKERS,
+    requests_per_second=REQUESTS_PER_SECOND,
+    full_refresh=False
+):
+    """
+    Fetch all combinations of commodities, metrics, and states concurrently.
+    Only missing or stale year windows are requested, based on the fetch
+    manifest in data/raw/ (full_refresh=True ignores it). Each window's grid
+    is coalesced into as few multi-valued requests as the API row limit
+    allows; requests share one keep-alive session and a token-bucket rate
+    limiter. Returns the raw file paths in combination order.
+    """
+    combinations = [
+        (commodity, metric, state)
+        for commodity in COMMODITIES
+        for metric in METRICS
+        for state in STATES
+    ]
+
+    manifest = FetchManifest()
+    if full_refresh:
+        manifest.data = {"combinations": {}, "requests": {}}
+
+    # Group combinations by the year window they still need
+    saved = {}
+    by_window = {}
+    for combination in combinations:
+        entry = manifest.get(*combination)
+        if not os.path.exists(raw_path(*combination)):
+            entry = None
+
+        window = fetch_window(entry)
+        if window is None:
+            saved[combination] = raw_path(*combination)
+        else:
+            by_window.setdefault(window, []).append(combination)
+
+    jobs = [
+        (batch, window)
+        for window, pending in by_window.items()
+        for block in group_grid(pending)
+        for batch in plan_requests(block["commodities"], block["metrics"], block["states"], *window)
+    ]
+    total = len(jobs)
+
+    print(f"Starting extraction for {len(combinations)} combinations "
+          f"({len(saved)} up to date) in {total} requests "
+          f"({max_workers} workers, {requests_per_second} req/s)...\n")
 
+    session = create_session(pool_size=max_workers)
+    rate_limiter = RateLimiter(requests_per_second)
 
-def fetch_all():
-    """Fetch all combinations of commodities, metrics, and states."""
-    downloaded_files = []
-    total = len(COMMODITIES) * len(METRICS) * len(STATES)
-    c = 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                fetch_batch, batch, window[0], window[1],
+                session=session, rate_limiter=rate_limiter, manifest=manifest
+            ): batch
+            for batch, window in jobs
+        }
 
-    print(f"Starting extraction for {total} combinations...\n")
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                saved.update(future.result())
+            except Exception as e:
+                # A failure in one batch does not stop the whole extraction
+                print(f"Error fetching batch {futures[future]}: {e}")
+            print(f"[{done}/{total}]")
 
-    for commodity in COMMODITIES:
-        for metric in METRICS:
-            for state in STATES:
-                print(f"[{c}/{total}]")
-                result = fetch_usda_data(commodity, metric, state)
-                if result:
-                    downloaded_files.append(result)
-                c += 1
-                sleep(1)
+    session.close()
+    manifest.save()
 
-    print(f"\nCompleted extraction: {len(downloaded_files)} files saved to data/raw/")
+    downloaded_files = [saved[c] for c in combinations if c in saved]
+    print(f"\nCompleted extraction: {len(downloaded_files)} files available in {RAW_FOLDER}/")
     return downloaded_files
 
 
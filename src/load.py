@@ -1,7 +1,16 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
 from dotenv import load_dotenv
+import argparse
 import os
+import tempfile
+import time
 import pandas as pd
+from records import NATURAL_KEY
+from metrics import DB_CHUNK_SECONDS, DB_ROWS
+from schema import apply_schema
+from processed import iter_processed, read_processed
+from derived import PRODUCTION_VALUE_COLUMNS, PRODUCTION_VALUE_PATH, normalize_units, read_production_value
 
 load_dotenv("config/.env")
 
@@ -18,7 +27,19 @@ MYSQL_URI = (
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}"
     f"@{MYSQL_HOST}/{MYSQL_DATABASE}"
 )
-engine = create_engine(MYSQL_URI)
+# local_infile lets the bulk path use LOAD DATA LOCAL INFILE
+engine = create_engine(MYSQL_URI, connect_args={"local_infile": True})
+
+# Loads with at least this many rows use the LOAD DATA bulk path
+BULK_THRESHOLD = int(os.getenv("MYSQL_BULK_THRESHOLD", "100000"))
+# MySQL errors meaning LOCAL INFILE is disabled, the only ones that fall
+# back to batched inserts: 1148 (command not allowed), 2068 (rejected by
+# the client) and 3948 (local data disabled on the server)
+LOCAL_INFILE_ERRORS = {1148, 2068, 3948}
+
+# Approximate peak memory per loaded row (typed frame, resolved ids and the
+# Python tuples built for executemany), used to size streamed load batches
+LOAD_ROW_BYTES = 1024
 
 REQUIRED_COLUMNS = [
     "year",
@@ -29,14 +50,79 @@ REQUIRED_COLUMNS = [
     "value"
 ]
 
+# One observation per natural key (see records.NATURAL_KEY and
+# sql/migration_add_revision_columns.sql); load_time is the revision.
+# normalized_* are the converted units (see derived.normalize_units)
+LOAD_COLUMNS = NATURAL_KEY + ["load_time", "value", "normalized_unit", "normalized_value"]
+
+# String columns stored as integer ids in dimension tables
+# (see sql/migration_add_dimensions_and_indexes.sql)
+DIMENSIONS = {
+    "state_name": ("dim_state", "state_id"),
+    "commodity_desc": ("dim_commodity", "commodity_id"),
+    "statisticcat_desc": ("dim_statistic", "statistic_id"),
+    "unit_desc": ("dim_unit", "unit_id"),
+}
+# CREATE TABLE ... LIKE does not copy foreign keys, so swap loads add them
+# to the shadow table; unnamed, they follow the table through RENAME TABLE
+# (see sql/migration_add_foreign_keys.sql)
+FOREIGN_KEYS_SQL = ", ".join(
+    f"ADD FOREIGN KEY ({id_column}) REFERENCES {table} (id)"
+    for table, id_column in DIMENSIONS.values()
+)
+FACT_COLUMNS = [
+    "year",
+    "state_id",
+    "commodity_id",
+    "statistic_id",
+    "unit_id",
+    "reference_period_desc",
+    "freq_desc",
+    "short_desc",
+    "load_time",
+    "value",
+    "normalized_unit",
+    "normalized_value",
+]
+
+# Existing rows only take values from the same or a newer revision.
+# MySQL applies the assignments left to right, so the values are compared
+# against the stored load_time before load_time itself is updated (last).
+# Stored values are qualified with the target table: in the bulk path's
+# INSERT ... SELECT the staging table has the same columns, and bare names
+# are ambiguous there (MySQL error 1052)
+REVISION_COLUMNS = ["value", "normalized_unit", "normalized_value", "load_time"]
+NEWER_REVISION = "{table}.load_time IS NULL OR VALUES(load_time) >= {table}.load_time"
+
+# Derived series table (see sql/migration_add_unit_and_price_ton.sql)
+PRODUCTION_VALUE_TABLE = "usda_production_value"
+PRODUCTION_VALUE_FACT_COLUMNS = [
+    "year",
+    "state_id",
+    "commodity_id",
+    "series",
+    "price_period",
+    "price_per_ton",
+    "production_tons",
+    "value_usd",
+]
+
+# name → id per dimension table, cached for the life of the process
+dimension_ids = {}
+
+# Precomputed aggregates (see sql/migration_add_summary_table.sql)
+SUMMARY_TABLE = "usda_summary"
+# One row per reference period, so forecasts and monthly figures are never
+# added to the annual one (see sql/migration_add_summary_period.sql)
+SUMMARY_KEYS = "statistic_id, year, state_id, commodity_id, unit_id, reference_period_desc"
+
 
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normalize the DataFrame before loading it into MySQL:
     - Convert column names to lowercase
     - Validate required columns
-    - Clean column types
-    - Replace NaN → None for SQL compatibility
+    - Cast to the canonical dtypes (kept typed; see to_rows for the SQL conversion)
     """
 
     df.columns = [col.lower() for col in df.columns]
@@ -46,58 +132,374 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    # Keep only required columns
-    df = df[REQUIRED_COLUMNS].copy()
+    # Processed outputs written before unit normalization are converted here
+    if "normalized_unit" not in df.columns:
+        df = normalize_units(df.copy())
 
-    # Normalize types
-    df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
-    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    # Keep only the loaded columns (reindex returns a new frame); older files
+    # have no reference period, apply_schema fills its default
+    df = df.reindex(columns=LOAD_COLUMNS)
 
-    # Replace NaN with None before sending to SQL
-    df = df.where(pd.notnull(df), None)
+    # Canonical dtypes (see schema.py)
+    return apply_schema(df)
 
-    return df
 
+def to_rows(df: pd.DataFrame):
+    """Row tuples for executemany, with NaN replaced by None."""
+    df = df.astype(object).where(pd.notnull(df), None)
+    return list(df.itertuples(index=False, name=None))
 
-def upsert_dataframe(
-    df: pd.DataFrame,
-    table_name="usda_observations",
-    clean_before_insert=True,
-    chunk_size=1000
+
+def resolve_dimensions(df: pd.DataFrame, columns=FACT_COLUMNS) -> pd.DataFrame:
+    """
+    Replace dimension strings with their integer ids and return `columns`
+    (FACT_COLUMNS by default); only the dimensions present in df are mapped.
+    Names not yet in a dimension table are inserted first, in their own
+    transaction; ids are cached so repeated loads only query new names.
+    """
+    facts = df.copy()
+
+    with engine.begin() as conn:
+        for column, (table, id_column) in DIMENSIONS.items():
+            if column not in df.columns:
+                continue
+            cache = dimension_ids.setdefault(table, {})
+            new_names = sorted(n for n in df[column].dropna().unique() if n not in cache)
+
+            if new_names:
+                conn.exec_driver_sql(
+                    f"INSERT IGNORE INTO {table} (name) VALUES (%s)",
+                    [(name,) for name in new_names],
+                )
+                # Dimension tables are tiny: reload them whole
+                cache.update(conn.execute(text(f"SELECT name, id FROM {table}")).tuples().all())
+
+            # On categoricals only the categories are mapped
+            facts[id_column] = df[column].map(cache).astype("Int64")
+
+    return facts[columns]
+
+
+def update_sql(table_name):
+    """ON DUPLICATE KEY UPDATE assignments of REVISION_COLUMNS into table_name."""
+    newer = NEWER_REVISION.format(table=table_name)
+    return ", ".join(
+        f"{column} = IF({newer}, VALUES({column}), {table_name}.{column})"
+        for column in REVISION_COLUMNS
+    )
+
+
+def upsert_sql(table_name):
+    """INSERT ... ON DUPLICATE KEY UPDATE statement for FACT_COLUMNS."""
+    columns = ", ".join(FACT_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(FACT_COLUMNS))
+    return (
+        f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders}) "
+        f"ON DUPLICATE KEY UPDATE {update_sql(table_name)}"
+    )
+
+
+def merge_sql(table_name, staging):
+    """INSERT ... SELECT ... ON DUPLICATE KEY UPDATE from staging into table_name."""
+    columns = ", ".join(FACT_COLUMNS)
+    return (
+        f"INSERT INTO {table_name} ({columns}) "
+        f"SELECT {columns} FROM {staging} "
+        f"ON DUPLICATE KEY UPDATE {update_sql(table_name)}"
+    )
+
+
+def insert_rows(conn, table_name, df, chunk_size):
+    """
+    Write rows with multi-row INSERT ... ON DUPLICATE KEY UPDATE batches
+    (executemany). Returns the number of affected rows reported by MySQL:
+    1 per inserted row, 2 per updated row, 0 for unchanged rows.
+    """
+    sql = upsert_sql(table_name)
+    rows = to_rows(df)
+    affected = 0
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        with DB_CHUNK_SECONDS.labels("insert").time():
+            result = conn.exec_driver_sql(sql, chunk)
+        DB_ROWS.labels("insert").inc(len(chunk))
+        affected += max(result.rowcount, 0)
+        print(f"Upserted rows {start} → {start + len(chunk)}")
+
+    return affected
+
+
+def bulk_load(conn, table_name, df):
+    """
+    Stream the frame to a temporary CSV, LOAD DATA LOCAL INFILE it into a
+    temporary staging table, then merge it into table_name with
+    INSERT ... SELECT ... ON DUPLICATE KEY UPDATE.
+    Raises if the server does not allow LOCAL INFILE.
+    """
+    staging = f"{table_name}_staging"
+    columns = ", ".join(FACT_COLUMNS)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+        csv_path = f.name
+        df.to_csv(f, header=False, index=False, na_rep="NULL", lineterminator="\n")
+
+    try:
+        conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {staging}"))
+        conn.execute(text(f"CREATE TEMPORARY TABLE {staging} LIKE {table_name}"))
+
+        # pymysql interpolates the path client-side as a quoted literal
+        conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {staging} "
+            f"CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '\\n' ({columns})",
+            (csv_path,),
+        )
+
+        result = conn.execute(text(merge_sql(table_name, staging)))
+        conn.execute(text(f"DROP TEMPORARY TABLE {staging}"))
+        return max(result.rowcount, 0)
+    finally:
+        os.remove(csv_path)
+
+
+def local_infile_refused(error):
+    """True if a DBAPIError is MySQL refusing LOAD DATA LOCAL INFILE."""
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] in LOCAL_INFILE_ERRORS
+
+
+def write_rows(conn, table_name, df, chunk_size, bulk):
+    """
+    Write rows through the bulk path or batched inserts, falling back to
+    batched inserts when MySQL refuses LOAD DATA LOCAL INFILE (any other
+    error is raised). Prints the throughput of the path used. Returns affected rows.
+    """
+    method = "LOAD DATA" if bulk else "batched INSERT"
+    start = time.perf_counter()
+
+    try:
+        if bulk:
+            # The whole frame is a single LOAD DATA chunk
+            with DB_CHUNK_SECONDS.labels("load_data").time():
+                affected = bulk_load(conn, table_name, df)
+            DB_ROWS.labels("load_data").inc(len(df))
+        else:
+            affected = None
+    except DBAPIError as e:
+        if not local_infile_refused(e):
+            raise
+        print(f"[WARNING] LOAD DATA LOCAL INFILE unavailable ({e.orig}) → falling back to batched inserts")
+        method = "batched INSERT (fallback)"
+        affected = None
+
+    if affected is None:
+        affected = insert_rows(conn, table_name, df, chunk_size)
+
+    elapsed = time.perf_counter() - start
+    print(f"[{method}] {len(df)} rows in {elapsed:.2f}s → {len(df) / max(elapsed, 1e-9):,.0f} rows/sec")
+    return affected
+
+
+def refresh_summaries(conn, facts_table="usda_facts", partitions=None):
+    """
+    Recompute SUMMARY_TABLE rows from the facts table.
+    partitions is a list of (statistic_id, year) pairs touched by a load;
+    None rebuilds every partition.
+    """
+    where = ""
+    params = ()
+    if partitions is not None:
+        if not partitions:
+            return
+        where = "WHERE (statistic_id, year) IN (" + ", ".join(["(%s, %s)"] * len(partitions)) + ")"
+        params = tuple(v for pair in partitions for v in pair)
+
+    conn.exec_driver_sql(f"DELETE FROM {SUMMARY_TABLE} {where}", params)
+    conn.exec_driver_sql(
+        f"INSERT INTO {SUMMARY_TABLE} ({SUMMARY_KEYS}, obs_count, value_count, "
+        f"value_sum, value_mean, value_min, value_max) "
+        f"SELECT {SUMMARY_KEYS}, COUNT(*), COUNT(value), "
+        f"SUM(value), AVG(value), MIN(value), MAX(value) "
+        f"FROM {facts_table} {where} "
+        f"GROUP BY {SUMMARY_KEYS}",
+        params,
+    )
+
+    scope = "all partitions" if partitions is None else f"{len(partitions)} partitions"
+    print(f"Refreshed {SUMMARY_TABLE} for {scope}")
+
+
+def bump_data_version(conn):
+    """Increment the data version the API uses to invalidate its response cache."""
+    conn.execute(text(
+        "INSERT INTO etl_data_version (id, version) VALUES (1, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1"
+    ))
+
+
+def touched_partitions(df: pd.DataFrame):
+    """(statistic_id, year) pairs present in a resolved fact frame."""
+    pairs = df[["statistic_id", "year"]].drop_duplicates()
+    return [(int(s), int(y)) for s, y in pairs.itertuples(index=False, name=None)]
+
+
+def load_batches(
+    batches,
+    table_name="usda_facts",
+    mode="upsert",
+    chunk_size=1000,
+    bulk=None
 ):
     """
-    Insert the DataFrame into MySQL in chunks.
-    If clean_before_insert=True, the destination table is cleared before loading data.
+    Load an iterable of DataFrames into MySQL, keyed on NATURAL_KEY, holding
+    only one batch in memory at a time (see processed.iter_processed).
+    Strings are resolved to dimension ids and rows are written to the
+    usda_facts table (read back through the usda_observations view).
+    - mode="upsert": INSERT ... ON DUPLICATE KEY UPDATE, one transaction per
+      batch. Unchanged rows are left untouched and rows missing from the
+      batches are kept, which suits incremental runs; after a failure the
+      batches already committed stay loaded and a re-run converges.
+    - mode="swap": every batch goes into one shadow table that is atomically
+      swapped in with RENAME TABLE, so readers never see a partial table.
+    usda_summary is refreshed for the (statistic, year) partitions touched
+    (all partitions after a swap) and etl_data_version is bumped.
+    bulk=True stages rows with LOAD DATA LOCAL INFILE; None picks it
+    automatically for batches of at least BULK_THRESHOLD rows.
+    Returns the number of rows loaded, or None if the load failed.
     """
-    total = len(df)
-    if total == 0:
-        print("DataFrame is empty → no records inserted.")
-        return
+    if mode not in ("upsert", "swap"):
+        raise ValueError(f"Unknown load mode: {mode}")
+
+    total = 0
+    shadow = f"{table_name}_shadow"
+    old = f"{table_name}_old"
+    target = table_name if mode == "upsert" else shadow
 
-    df = clean_dataframe(df)
+    for df in batches:
+        if df.empty:
+            continue
+
+        if mode == "swap" and total == 0:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {shadow}"))
+                    conn.execute(text(f"CREATE TABLE {shadow} LIKE {table_name}"))
+                    conn.execute(text(f"ALTER TABLE {shadow} {FOREIGN_KEYS_SQL}"))
+            except Exception as e:
+                print(f"[ERROR] Could not create {shadow}: {e}")
+                return
+
+        df = clean_dataframe(df)
 
-    # Optionally clear the table before loading
-    if clean_before_insert:
         try:
-            with engine.begin() as conn:
-                conn.execute(text(f"DELETE FROM {table_name}"))
-            print(f"Cleared destination table: {table_name}")
+            df = resolve_dimensions(df)
         except Exception as e:
-            print(f"[ERROR] Could not clear table {table_name}: {e}")
+            print(f"[ERROR] Could not resolve dimension ids: {e}")
             return
 
-    # Insert data in chunks
-    for start in range(0, total, chunk_size):
-        chunk = df.iloc[start:start + chunk_size].copy()
+        use_bulk = len(df) >= BULK_THRESHOLD if bulk is None else bulk
 
         try:
-            chunk.to_sql(table_name, con=engine, if_exists="append", index=False)
-            print(f"Inserted rows {start} → {start + len(chunk)}")
+            # One transaction per batch: a failure rolls back every chunk of it
+            with engine.begin() as conn:
+                affected = write_rows(conn, target, df, chunk_size, use_bulk)
+                if mode == "upsert":
+                    refresh_summaries(conn, table_name, touched_partitions(df))
+                    bump_data_version(conn)
         except Exception as e:
-            print(f"[ERROR] Failed inserting chunk {start}: {e}")
+            if mode == "upsert":
+                print(f"[ERROR] Upsert into {table_name} failed, batch rolled back: {e}")
+            else:
+                print(f"[ERROR] Shadow load into {table_name} failed, live table untouched: {e}")
             return
 
-    print(f"\nLoad completed! Total rows inserted: {total}")
+        total += len(df)
+        if mode == "upsert":
+            print(f"Batch upserted → {len(df)} rows ({affected} affected)")
+
+    if total == 0:
+        print("DataFrame is empty → no records inserted.")
+        return 0
+
+    if mode == "upsert":
+        print(f"\nLoad completed! {total} rows upserted")
+        return total
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {old}"))
+            conn.execute(text(f"RENAME TABLE {table_name} TO {old}, {shadow} TO {table_name}"))
+            conn.execute(text(f"DROP TABLE {old}"))
+    except Exception as e:
+        print(f"[ERROR] Shadow load into {table_name} failed, live table untouched: {e}")
+        return
+
+    try:
+        with engine.begin() as conn:
+            refresh_summaries(conn, table_name)
+            bump_data_version(conn)
+    except Exception as e:
+        print(f"[ERROR] Could not refresh {SUMMARY_TABLE} / data version: {e}")
+
+    print(f"\nLoad completed! {total} rows swapped into {table_name}")
+    return total
+
+
+def upsert_dataframe(
+    df: pd.DataFrame,
+    table_name="usda_facts",
+    mode="upsert",
+    chunk_size=1000,
+    bulk=None
+):
+    """
+    Load a single DataFrame (see load_batches); in upsert mode the whole
+    frame is one transaction.
+    Returns the number of rows loaded, or None if the load failed.
+    """
+    return load_batches([df], table_name, mode, chunk_size, bulk)
+
+
+def load_production_value(df: pd.DataFrame, chunk_size=1000):
+    """
+    Replace usda_production_value with the derived series (see
+    derived.production_value) in one transaction, and bump etl_data_version.
+    The series are rebuilt from the whole processed dataset on every run,
+    so the table is replaced rather than upserted.
+    Returns the number of rows loaded, or None if the load failed.
+    """
+    df = df.reindex(columns=PRODUCTION_VALUE_COLUMNS)
+
+    try:
+        facts = resolve_dimensions(df, PRODUCTION_VALUE_FACT_COLUMNS)
+    except Exception as e:
+        print(f"[ERROR] Could not resolve dimension ids: {e}")
+        return
+
+    columns = ", ".join(PRODUCTION_VALUE_FACT_COLUMNS)
+    placeholders = ", ".join(["%s"] * len(PRODUCTION_VALUE_FACT_COLUMNS))
+    rows = to_rows(facts)
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {PRODUCTION_VALUE_TABLE}"))
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                with DB_CHUNK_SECONDS.labels("insert").time():
+                    conn.exec_driver_sql(
+                        f"INSERT INTO {PRODUCTION_VALUE_TABLE} ({columns}) VALUES ({placeholders})",
+                        chunk,
+                    )
+                DB_ROWS.labels("insert").inc(len(chunk))
+            bump_data_version(conn)
+    except Exception as e:
+        print(f"[ERROR] Load into {PRODUCTION_VALUE_TABLE} failed, rolled back: {e}")
+        return
+
+    print(f"Loaded {len(rows)} rows into {PRODUCTION_VALUE_TABLE}")
+    return len(rows)
 
 
 def test_connection():
@@ -110,14 +512,44 @@ def test_connection():
         print(f"[ERROR] Database connection failed: {e}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the processed USDA dataset into MySQL")
+    parser.add_argument("--statistic", help="Only load this statisticcat_desc (e.g. YIELD)")
+    parser.add_argument("--commodity", help="Only load this commodity (e.g. CORN)")
+    parser.add_argument("--year-from", type=int, help="Only load years >= this")
+    parser.add_argument("--year-to", type=int, help="Only load years <= this")
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        help="Stream the processed data in batches of this many rows instead of reading it whole",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     test_connection()
 
-    try:
-        df = pd.read_csv("data/processed/usda_processed.csv")
-        print(f"Loaded processed CSV → {len(df)} rows")
-    except Exception as e:
-        print(f"[ERROR] Could not read processed CSV: {e}")
-        exit()
+    filters = dict(
+        statistic=args.statistic,
+        commodity=args.commodity,
+        year_from=args.year_from,
+        year_to=args.year_to,
+    )
+
+    if args.batch_rows:
+        load_batches(iter_processed(columns=LOAD_COLUMNS, batch_rows=args.batch_rows, **filters))
+    else:
+        try:
+            # Only the loaded columns of the matching partitions are read
+            df = read_processed(columns=LOAD_COLUMNS, **filters)
+            print(f"Loaded processed data → {len(df)} rows")
+        except Exception as e:
+            print(f"[ERROR] Could not read processed data: {e}")
+            exit()
+
+        upsert_dataframe(df)
 
-    upsert_dataframe(df)
+    # Derived series (python src/derived.py), rebuilt from the whole dataset
+    if os.path.exists(PRODUCTION_VALUE_PATH):
+        load_production_value(read_production_value())
@@ -0,0 +1,100 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from prometheus_client import REGISTRY, Counter, Histogram, start_http_server
+
+# ETL instrumentation. Everything is recorded per request, per chunk or per
+# stage (never per row), so it stays on permanently. ETL_METRICS_PORT serves
+# the metrics over HTTP while a run is in progress; run_etl writes them to a
+# JSON run report at the end.
+METRICS_PREFIX = "usda_etl_"
+REPORTS_FOLDER = "data/reports"
+
+STAGE_SECONDS = Histogram(
+    "usda_etl_stage_seconds", "Wall time of a pipeline stage", ["stage"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+STAGE_ROWS = Counter("usda_etl_stage_rows", "Rows produced by a pipeline stage", ["stage"])
+STAGE_BYTES = Counter("usda_etl_stage_bytes", "Bytes read or written by a pipeline stage", ["stage", "direction"])
+
+# One Quick Stats request may cover many combinations (query coalescing), so
+# latency is labelled by response status and rows by commodity/statistic
+FETCH_SECONDS = Histogram(
+    "usda_etl_fetch_seconds", "Quick Stats request latency (until the body is parsed)", ["status"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+FETCH_ROWS = Counter("usda_etl_fetch_rows", "Rows received from Quick Stats", ["commodity", "statistic"])
+
+DB_CHUNK_SECONDS = Histogram(
+    "usda_etl_db_chunk_seconds", "Time to write one chunk into MySQL", ["method"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_ROWS = Counter("usda_etl_db_rows", "Rows written into MySQL", ["method"])
+
+
+def start_metrics_server():
+    """Serve /metrics on ETL_METRICS_PORT, if set. Returns the port or None."""
+    port = os.getenv("ETL_METRICS_PORT")
+    if not port:
+        return None
+    start_http_server(int(port))
+    print(f"[METRICS] Serving ETL metrics on :{port}/metrics")
+    return int(port)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a block as a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def folder_bytes(path):
+    """Total size of the files under path (0 if missing)."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def snapshot():
+    """
+    Current values of the ETL metrics as plain data:
+    {metric: [{"labels": {...}, "value": ...}, ...]}, histograms as
+    _count/_sum samples.
+    """
+    data = {}
+    for metric in REGISTRY.collect():
+        if not metric.name.startswith(METRICS_PREFIX):
+            continue
+        for sample in metric.samples:
+            if sample.name.endswith(("_bucket", "_created")):
+                continue
+            data.setdefault(sample.name, []).append({"labels": sample.labels, "value": sample.value})
+    return data
+
+
+def write_run_report(run_id, status, extra=None, folder=REPORTS_FOLDER):
+    """Write the metrics of this run as JSON; returns the report path."""
+    os.makedirs(folder, exist_ok=True)
+    finished = datetime.now(timezone.utc)
+    report = {
+        "run_id": run_id,
+        "status": status,
+        "finished_at": finished.isoformat(),
+        **(extra or {}),
+        "metrics": snapshot(),
+    }
+    path = os.path.join(folder, f"run_{finished.strftime('%Y%m%dT%H%M%SZ')}_{run_id}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[METRICS] Run report → {path}")
+    return path
@@ -0,0 +1,223 @@
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime, timezone
+from metrics import stage_timer
+
+CHECKPOINT_PATH = "data/pipeline_checkpoint.json"
+
+
+def content_hash(paths, exclude=()):
+    """
+    SHA-256 over the contents of files and directory trees (relative paths
+    included, file names in `exclude` skipped). Missing paths hash as absent.
+    """
+    digest = hashlib.sha256()
+
+    for root in paths:
+        if not os.path.exists(root):
+            digest.update(f"missing:{root}\n".encode())
+            continue
+
+        files = [root]
+        if os.path.isdir(root):
+            files = sorted(
+                os.path.join(folder, name)
+                for folder, _, names in os.walk(root)
+                for name in names
+                if name not in exclude
+            )
+
+        for path in files:
+            digest.update(f"{os.path.relpath(path, root)}\n".encode())
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def value_hash(value):
+    """SHA-256 of a JSON-serializable value (stage parameters)."""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Stage:
+    """
+    One pipeline step.
+    - run(context) does the work; context is a dict shared by all stages
+    - requires: names of the stages it depends on
+    - inputs / outputs: paths whose contents are hashed (files or folders)
+    - params: extra values that change the result (part of the fingerprint)
+    - always: run even when inputs are unchanged (e.g. incremental extraction,
+      which decides on its own what is stale)
+    """
+
+    def __init__(self, name, run, requires=(), inputs=(), outputs=(), params=None,
+                 always=False, exclude=()):
+        self.name = name
+        self.run = run
+        self.requires = list(requires)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.always = always
+        self.exclude = tuple(exclude)
+
+    def fingerprint(self):
+        return value_hash({
+            "params": self.params,
+            "inputs": content_hash(self.inputs, self.exclude),
+        })
+
+    def outputs_hash(self):
+        return content_hash(self.outputs, self.exclude)
+
+
+class Checkpoint:
+    """
+    Stage checkpoints persisted as JSON:
+    {"run_id": ..., "status": "running|failed|done",
+     "stages": {name: {"fingerprint", "outputs_hash", "run_id", "completed_at"}}}
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH):
+        self.path = path
+        self.data = {"run_id": None, "status": None, "stages": {}}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                print(f"[WARNING] Unreadable checkpoint {path}, starting fresh")
+
+    def get(self, name):
+        return self.data["stages"].get(name)
+
+    def complete(self, name, fingerprint, outputs_hash):
+        self.data["stages"][name] = {
+            "fingerprint": fingerprint,
+            "outputs_hash": outputs_hash,
+            "run_id": self.data["run_id"],
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self.save()
+
+    def start_run(self, resume=False):
+        """Start a new run, or keep the previous run id when resuming an unfinished one."""
+        unfinished = self.data.get("status") in ("running", "failed")
+        if not (resume and unfinished):
+            self.data["run_id"] = uuid.uuid4().hex[:12]
+        self.set_status("running")
+        return self.data["run_id"]
+
+    def set_status(self, status):
+        self.data["status"] = status
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def stage_order(stages):
+    """Stages sorted so every stage comes after the ones it requires."""
+    by_name = {s.name: s for s in stages}
+    ordered, visiting, done = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Cycle in pipeline at stage '{stage.name}'")
+        visiting.add(stage.name)
+        for name in stage.requires:
+            if name not in by_name:
+                raise ValueError(f"Stage '{stage.name}' requires unknown stage '{name}'")
+            visit(by_name[name])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+def downstream(stages, name):
+    """Names of `name` and every stage that (transitively) requires it."""
+    selected = {name}
+    for stage in stage_order(stages):
+        if selected & set(stage.requires):
+            selected.add(stage.name)
+    return selected
+
+
+def select_stages(stages, from_stage=None, only=None):
+    """Names of the stages to consider for this run (--from-stage / --only)."""
+    names = [s.name for s in stages]
+    for name in filter(None, [from_stage, *(only or [])]):
+        if name not in names:
+            raise ValueError(f"Unknown stage '{name}'. Stages: {names}")
+
+    if only:
+        return set(only)
+    if from_stage:
+        return downstream(stages, from_stage)
+    return set(names)
+
+
+def run_pipeline(stages, context=None, from_stage=None, only=None, resume=False,
+                 force=False, checkpoint=None):
+    """
+    Run the stages in dependency order.
+    A selected stage is skipped when its checkpoint matches: same fingerprint
+    (params + input contents) and outputs unchanged since it completed. With
+    resume=True, stages completed by the unfinished previous run are skipped
+    as well (even `always` stages). force=True runs every selected stage.
+    Returns the shared context.
+    """
+    context = {} if context is None else context
+    checkpoint = checkpoint or Checkpoint()
+    selected = select_stages(stages, from_stage, only)
+    run_id = checkpoint.start_run(resume)
+    context["run_id"] = run_id
+    print(f"[PIPELINE] Run {run_id}: {', '.join(s.name for s in stage_order(stages) if s.name in selected)}")
+
+    try:
+        for stage in stage_order(stages):
+            if stage.name not in selected:
+                print(f"[SKIP] {stage.name} (not selected)")
+                continue
+
+            previous = checkpoint.get(stage.name)
+            fingerprint = stage.fingerprint()
+            outputs_intact = (
+                not force
+                and previous is not None
+                and previous["outputs_hash"] == stage.outputs_hash()
+            )
+
+            if outputs_intact and resume and previous["run_id"] == run_id:
+                print(f"[SKIP] {stage.name} (completed earlier in run {run_id})")
+                continue
+            if outputs_intact and not stage.always and previous["fingerprint"] == fingerprint:
+                print(f"[SKIP] {stage.name} (inputs unchanged)")
+                continue
+
+            print(f"\n[STAGE] {stage.name}")
+            with stage_timer(stage.name):
+                stage.run(context)
+            # Inputs are re-hashed: an upstream stage may have produced them in this run
+            checkpoint.complete(stage.name, stage.fingerprint(), stage.outputs_hash())
+
+    except Exception:
+        checkpoint.set_status("failed")
+        raise
+
+    checkpoint.set_status("done")
+    return context
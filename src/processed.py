@@ -0,0 +1,216 @@
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from dotenv import load_dotenv
+import pandas as pd
+from schema import CATEGORY_COLUMNS, apply_schema, read_processed_csv
+
+load_dotenv("config/.env")
+
+PROCESSED_FOLDER = "data/processed"
+# Hive-partitioned Parquet dataset: statisticcat_desc=.../commodity_desc=.../year=.../*.parquet
+PROCESSED_DATASET = os.path.join(PROCESSED_FOLDER, "observations")
+PROCESSED_CSV = os.path.join(PROCESSED_FOLDER, "usda_processed.csv")
+
+# Processed output format: "parquet" (partitioned dataset) or "csv" (single file)
+PROCESSED_FORMAT = os.getenv("USDA_PROCESSED_FORMAT", "parquet").lower()
+
+# Bump when the processed columns change, so the pipeline re-runs the
+# transform even though its raw inputs did not change
+PROCESSED_VERSION = 2
+
+PARTITION_SCHEMA = pa.schema([
+    ("statisticcat_desc", pa.string()),
+    ("commodity_desc", pa.string()),
+    ("year", pa.int16()),
+])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+
+
+def processed_files(processed_format=PROCESSED_FORMAT):
+    """Data files of the processed output (empty when nothing was written)."""
+    if processed_format == "csv":
+        return [PROCESSED_CSV] if os.path.isfile(PROCESSED_CSV) else []
+
+    paths = []
+    for root, _, names in os.walk(PROCESSED_DATASET):
+        paths.extend(os.path.join(root, n) for n in names if n.endswith(".parquet"))
+    return paths
+
+
+def to_partitioned_table(df):
+    """Arrow table with the partition columns as plain (non-dictionary) types."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for field in PARTITION_SCHEMA:
+        i = table.schema.get_field_index(field.name)
+        table = table.set_column(i, field.name, pc.cast(table.column(i), field.type))
+    return table
+
+
+class ProcessedWriter:
+    """
+    Incremental writer for the processed output: each write() appends one
+    batch (new Parquet files in the touched partitions, or CSV rows), so
+    the full dataset never has to be held in memory.
+    Opening a writer replaces any previous output.
+    """
+
+    def __init__(self, processed_format=PROCESSED_FORMAT):
+        if processed_format not in ("parquet", "csv"):
+            raise ValueError(f"Unknown processed format: {processed_format}")
+
+        self.format = processed_format
+        self.path = PROCESSED_CSV if processed_format == "csv" else PROCESSED_DATASET
+        self.batches = 0
+        self.rows = 0
+
+        os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        if processed_format == "parquet":
+            # An empty dataset (not a missing one) when no batch is written
+            os.makedirs(self.path)
+
+    def write(self, df):
+        if self.format == "csv":
+            df.to_csv(self.path, index=False, mode="a", header=self.batches == 0)
+        else:
+            ds.write_dataset(
+                to_partitioned_table(df),
+                self.path,
+                format="parquet",
+                partitioning=PARTITIONING,
+                file_options=ds.ParquetFileFormat().make_write_options(write_statistics=True),
+                basename_template=f"part-{self.batches}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+        self.batches += 1
+        self.rows += len(df)
+
+
+def write_processed(df, processed_format=PROCESSED_FORMAT):
+    """
+    Write the processed frame, replacing any previous output.
+    Parquet files keep column statistics, so readers can skip row groups too.
+    Returns the output path.
+    """
+    writer = ProcessedWriter(processed_format)
+    writer.write(df)
+    return writer.path
+
+
+# Column checked by each build_filter argument
+FILTER_COLUMNS = {
+    "statistic": "statisticcat_desc",
+    "commodity": "commodity_desc",
+    "state": "state_name",
+    "year_from": "year",
+    "year_to": "year",
+}
+
+
+def build_filter(statistic=None, commodity=None, state=None, year_from=None, year_to=None):
+    """
+    Arrow filter expression for the processed dataset, or None.
+    Statistic, commodity and year prune whole partitions; state is checked
+    against the Parquet column statistics.
+    """
+    conditions = []
+    for column, value in [
+        ("statisticcat_desc", statistic),
+        ("commodity_desc", commodity),
+        ("state_name", state),
+    ]:
+        if value:
+            values = [value] if isinstance(value, str) else list(value)
+            conditions.append(pc.field(column).isin([v.upper() for v in values]))
+    if year_from is not None:
+        conditions.append(pc.field("year") >= year_from)
+    if year_to is not None:
+        conditions.append(pc.field("year") <= year_to)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_processed(columns=None, processed_format=PROCESSED_FORMAT, **filters):
+    """
+    Read the processed output into the canonical dtypes (see schema.py).
+    columns projects the read; filters are those of build_filter. On the
+    Parquet dataset only the matching partitions and columns are read; the
+    CSV has to be parsed whole and is filtered afterwards.
+    """
+    expression = build_filter(**filters)
+
+    if processed_format == "csv":
+        table = pa.Table.from_pandas(read_processed_csv(PROCESSED_CSV), preserve_index=False)
+    elif os.path.isdir(PROCESSED_DATASET) and not processed_files(processed_format):
+        # An empty dataset has no file schema: only the partition columns
+        return apply_schema(pd.DataFrame(columns=columns or []))
+    else:
+        dataset = ds.dataset(PROCESSED_DATASET, format="parquet", partitioning=PARTITIONING)
+        table = dataset.to_table(columns=columns, filter=expression)
+        expression = None
+
+    if expression is not None:
+        table = table.filter(expression)
+    if columns is not None:
+        table = table.select(columns)
+
+    return apply_schema(table.to_pandas())
+
+
+def distinct_values(column, processed_format=PROCESSED_FORMAT, **filters):
+    """Sorted distinct values of one column of the processed output."""
+    values = read_processed(columns=[column], processed_format=processed_format, **filters)[column]
+    return sorted(values.dropna().unique())
+
+
+def iter_processed(columns=None, batch_rows=500_000, processed_format=PROCESSED_FORMAT, **filters):
+    """
+    Like read_processed, but yields DataFrames of at most about batch_rows
+    rows, so the processed output can be consumed in bounded memory.
+    """
+    expression = build_filter(**filters)
+
+    if processed_format == "csv":
+        dtype = {c: "category" for c in CATEGORY_COLUMNS}
+        # The filter columns are read too, and projected away after filtering
+        usecols = columns
+        if columns is not None:
+            used = [FILTER_COLUMNS[k] for k, v in filters.items() if v is not None]
+            usecols = list(dict.fromkeys(columns + used))
+
+        for chunk in pd.read_csv(PROCESSED_CSV, dtype=dtype, usecols=usecols, chunksize=batch_rows):
+            table = pa.Table.from_pandas(apply_schema(chunk), preserve_index=False)
+            if expression is not None:
+                table = table.filter(expression)
+            if columns is not None:
+                table = table.select(columns)
+            if table.num_rows:
+                yield apply_schema(table.to_pandas())
+        return
+
+    if os.path.isdir(PROCESSED_DATASET) and not processed_files(processed_format):
+        return
+
+    dataset = ds.dataset(PROCESSED_DATASET, format="parquet", partitioning=PARTITIONING)
+    pending, pending_rows = [], 0
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=batch_rows):
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        if pending_rows >= batch_rows:
+            yield apply_schema(pa.Table.from_batches(pending).to_pandas())
+            pending, pending_rows = [], 0
+
+    if pending:
+        yield apply_schema(pa.Table.from_batches(pending).to_pandas())
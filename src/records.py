@@ -0,0 +1,186 @@
+import os
+import json
+import pandas as pd
+import pyarrow as pa
+import pyarrow.json as pa_json
+
+# Columns kept from each Quick Stats row
+OBSERVATION_COLUMNS = [
+    "year",
+    "state_name",
+    "commodity_desc",
+    "statisticcat_desc",
+    "unit_desc",
+    "value",
+]
+
+# Columns carried when present, with the default used for older raw files.
+# They tell apart rows that share year/state/commodity/statistic/unit:
+# reference period (month, forecast), frequency, series description
+# (e.g. WHEAT vs WHEAT, WINTER) and the publication time of the revision.
+OPTIONAL_COLUMNS = {
+    "reference_period_desc": "",
+    "freq_desc": "",
+    "short_desc": "",
+    "load_time": None,
+}
+
+# Quick Stats publishes load_time as "2024-01-15 12:00:00.000"; raw files
+# written by older versions may hold other ISO 8601 forms. Parsing without a
+# format infers it from the first value and turns every other form into NaT
+LOAD_TIME_FORMAT = "ISO8601"
+
+# One observation per natural key; load_time picks the latest revision
+NATURAL_KEY = [
+    "year",
+    "state_name",
+    "commodity_desc",
+    "statisticcat_desc",
+    "unit_desc",
+    "reference_period_desc",
+    "freq_desc",
+    "short_desc",
+]
+
+# Geographic level of the observations (Quick Stats agg_level_desc): rows
+# of other levels (county, district) share the state fields and would
+# collide with the state figures on NATURAL_KEY
+AGG_LEVEL = "STATE"
+
+# The final annual figure of each statistic (reference_period_desc; other
+# statistics use DEFAULT_ANNUAL_PERIOD). Aggregates across rows read only
+# this period, so forecasts (YEAR - AUG FORECAST, ...) and monthly prices
+# are never added to it. Shared by the API summaries and the dashboard
+ANNUAL_PERIODS = {
+    "PRICE RECEIVED": "MARKETING YEAR",
+    "PRODUCTION": "YEAR",
+    "YIELD": "YEAR",
+}
+DEFAULT_ANNUAL_PERIOD = "YEAR"
+
+# Quick Stats suppression codes published in place of a number
+SUPPRESSION_CODES = {
+    "(D)": "withheld to avoid disclosing individual operations",
+    "(Z)": "less than half the rounding unit",
+    "(NA)": "not available",
+    "(X)": "not applicable",
+    "(S)": "insufficient number of reports",
+}
+
+# Published values are read as text so suppression codes survive parsing
+RAW_PARSE_OPTIONS = pa_json.ParseOptions(
+    explicit_schema=pa.schema([("value", pa.string())])
+)
+
+
+def read_raw_file(path, published_values=False):
+    """
+    Read a raw file into a DataFrame.
+    NDJSON and Parquet are decoded column by column by Arrow, without
+    building an intermediate list of dicts; legacy JSON arrays are still
+    supported. Set published_values=True for NDJSON holding values as
+    published by Quick Stats (text with suppression codes).
+    """
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return pd.DataFrame(json.load(f))
+
+    if os.path.getsize(path) == 0:
+        return pd.DataFrame()
+    parse_options = RAW_PARSE_OPTIONS if published_values else None
+    return pa_json.read_json(path, parse_options=parse_options).to_pandas()
+
+
+def normalize_observations(df):
+    """
+    Vectorized cleaning of Quick Stats observations, shared by extract and transform.
+    - Lowercases column names and keeps OBSERVATION_COLUMNS plus OPTIONAL_COLUMNS
+    - Parses `value` (suppression codes, thousands separators) and `year`
+    - Drops rows of another agg_level_desc than AGG_LEVEL, when present
+    - Drops rows without year, state, commodity or a positive value
+    Returns (clean DataFrame, dict of dropped row counts by reason).
+    Already-normalized frames pass through cheaply, so calling it twice is safe.
+    """
+    df = df.rename(columns=str.lower)
+
+    missing = [c for c in OBSERVATION_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    if "agg_level_desc" in df.columns:
+        level = df["agg_level_desc"].astype("string").str.strip()
+        other_level = level.notna() & (level != "") & (level != AGG_LEVEL)
+    else:
+        other_level = pd.Series(False, index=df.index)
+
+    columns = OBSERVATION_COLUMNS + list(OPTIONAL_COLUMNS)
+    df = df.reindex(columns=columns).copy()
+    for column, default in OPTIONAL_COLUMNS.items():
+        if default is not None:
+            df[column] = df[column].fillna(default)
+    df["load_time"] = pd.to_datetime(df["load_time"], errors="coerce", format=LOAD_TIME_FORMAT)
+    dropped = {}
+
+    if pd.api.types.is_numeric_dtype(df["value"]):
+        value = df["value"].astype("float64")
+        suppressed = pd.Series(False, index=df.index)
+    else:
+        text = df["value"].astype("string").str.strip()
+        suppressed = text.isin(list(SUPPRESSION_CODES)).fillna(False)
+        value = pd.to_numeric(
+            text.mask(suppressed).str.replace(",", "", regex=False),
+            errors="coerce",
+        ).astype("float64")
+
+    year = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+
+    state = df["state_name"].astype("string").str.strip()
+    commodity = df["commodity_desc"].astype("string").str.strip()
+
+    reasons = [
+        ("other_agg_level", other_level),
+        ("missing_year", year.isna()),
+        ("missing_state", state.isna() | (state == "")),
+        ("missing_commodity", commodity.isna() | (commodity == "")),
+        ("suppressed", suppressed),
+        ("unparseable_value", value.isna()),
+        ("non_positive_value", value <= 0),
+    ]
+
+    # Each dropped row is counted once, under the first reason that applies
+    keep = pd.Series(True, index=df.index)
+    for reason, mask in reasons:
+        mask = mask.fillna(False).astype(bool) & keep
+        count = int(mask.sum())
+        if count:
+            dropped[reason] = count
+        keep &= ~mask
+
+    df["year"] = year
+    df["value"] = value
+    df = df[keep].reset_index(drop=True)
+
+    return df, dropped
+
+
+def deduplicate(df):
+    """
+    Keep one row per NATURAL_KEY: the latest revision by load_time (rows
+    without load_time count as oldest; ties keep the last row read).
+    Keys are compared on the key columns themselves. Row order is preserved.
+    Returns (deduplicated DataFrame, number of rows dropped).
+    """
+    if df.empty:
+        return df, 0
+
+    order = df["load_time"].sort_values(kind="stable", na_position="first").index
+    latest = ~df.loc[order].duplicated(subset=NATURAL_KEY, keep="last")
+    keep = latest.reindex(df.index)
+
+    dropped = int((~keep).sum())
+    if dropped:
+        df = df[keep].reset_index(drop=True)
+    return df, dropped
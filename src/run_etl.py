@@ -1,84 +1,220 @@
 import os
 import shutil
 import sys
-from extract import fetch_usda_data
-from transform import process_all_raw
-from load import upsert_dataframe
+import argparse
+from extract import fetch_all, RAW_FOLDER, MANIFEST_PATH
+from transform import MEMORY_BUDGET_MB, process_all_raw, process_all_raw_streaming
+from load import load_batches, load_production_value, upsert_dataframe, LOAD_COLUMNS, LOAD_ROW_BYTES
+from derived import PRODUCTION_VALUE_PATH, build_production_value, read_production_value
+from pipeline import Stage, run_pipeline, CHECKPOINT_PATH
+from processed import (
+    PROCESSED_CSV,
+    PROCESSED_DATASET,
+    PROCESSED_FORMAT,
+    PROCESSED_VERSION,
+    iter_processed,
+    read_processed,
+)
+from settings import query_grid
+from metrics import STAGE_ROWS, STAGE_BYTES, folder_bytes, start_metrics_server, write_run_report
+
+STAGES = ["extract", "transform", "derive", "load"]
 
 
 def clean_old_data():
     """
-    Deletes old ETL data before running a new pipeline.
-    This ensures the process always works with fresh files.
+    Deletes every ETL output before a full refresh: data/raw (with its fetch
+    manifest), the processed outputs and the pipeline checkpoint.
+    Normal runs keep them, so unchanged stages can be skipped.
     """
-    raw_folder = "data/raw"
-    processed_file = "data/processed/usda_processed.csv"
-
-    # Delete data/raw folder if it exists
-    if os.path.exists(raw_folder):
-        shutil.rmtree(raw_folder)
+    if os.path.exists(RAW_FOLDER):
+        shutil.rmtree(RAW_FOLDER)
         print("Removed data/raw folder")
 
-    # Delete the processed CSV if it exists
-    if os.path.exists(processed_file):
-        os.remove(processed_file)
+    # Delete the processed outputs (Parquet dataset and/or CSV) if they exist
+    if os.path.exists(PROCESSED_DATASET):
+        shutil.rmtree(PROCESSED_DATASET)
+        print("Removed processed Parquet dataset")
+    if os.path.exists(PROCESSED_CSV):
+        os.remove(PROCESSED_CSV)
         print("Removed usda_processed.csv")
+    if os.path.exists(PRODUCTION_VALUE_PATH):
+        os.remove(PRODUCTION_VALUE_PATH)
+        print("Removed production_value.parquet")
 
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+        print("Removed pipeline checkpoint")
 
-def main():
-    print("     USDA ETL PIPELINE")
 
-    try:
-        # Clean previous data before starting
-        clean_old_data()
-
-        # Parameters used for API requests
-        commodities = ["SOYBEANS", "CORN", "WHEAT"]
-        metrics = ["PRICE RECEIVED", "PRODUCTION", "YIELD"]
-        states = ["IA", "IL", "MN", "NE", "SD"]
-
-        # Create all possible combinations
-        combinations = [
-            (c, m, s) for c in commodities for m in metrics for s in states
-        ]
-
-        print(f"Starting extraction for {len(combinations)} combinations...\n")
-
-        # EXTRACTION
-        for i, (commodity, metric, state) in enumerate(combinations, start=1):
-            print(f"({i}/{len(combinations)}) Fetching {commodity} - {metric} - {state}")
-
-            try:
-                # API request
-                fetch_usda_data(
-                    commodity=commodity,
-                    metric=metric,
-                    state=state,
-                    year_from=2020,
-                    year_to=2024
-                )
-            except Exception as error:
-                # A failure in one combination does not stop the whole ETL
-                print(f"Error fetching {commodity}-{metric}-{state}: {error}")
-                continue
+def build_stages(args):
+    """The ETL as pipeline stages: extract → transform → derive → load."""
+    processed_output = PROCESSED_CSV if PROCESSED_FORMAT == "csv" else PROCESSED_DATASET
+    load_mode = "swap" if args.full_refresh else "upsert"
+    load_batch_rows = args.memory_budget_mb * 1024 * 1024 // LOAD_ROW_BYTES
 
+    def extract(context):
+        # Concurrent, rate-limited and incremental: up-to-date combinations
+        # cost no requests, so this stage always runs
+        fetch_all(full_refresh=args.full_refresh)
         print("\nExtraction completed.\n")
 
-        # TRANSFORMATION
-        df = process_all_raw()
+    def transform(context):
+        if args.stream:
+            # Batches go straight to the processed store; load streams them back
+            stats = process_all_raw_streaming(
+                workers=args.transform_workers,
+                memory_budget_mb=args.memory_budget_mb,
+            )
+            STAGE_ROWS.labels("transform").inc(stats["rows"])
+        else:
+            context["df"] = process_all_raw(workers=args.transform_workers)
+            STAGE_ROWS.labels("transform").inc(len(context["df"]))
+        STAGE_BYTES.labels("transform", "in").inc(folder_bytes(RAW_FOLDER))
+        STAGE_BYTES.labels("transform", "out").inc(folder_bytes(processed_output))
+
+    def derive(context):
+        # Price × production, joined once per run instead of once per query
+        values = build_production_value()
+        STAGE_ROWS.labels("derive").inc(len(values))
+
+    def load(context):
+        df = context.get("df")
 
-        if df.empty:
+        print("Loading data into MySQL...\n")
+        # A full refresh replaces the table atomically; otherwise upsert in place
+        if df is not None:
+            loaded = upsert_dataframe(df, mode=load_mode)
+        elif args.stream:
+            # Bounded memory: one batch of the processed output at a time
+            batches = iter_processed(columns=LOAD_COLUMNS, batch_rows=load_batch_rows)
+            loaded = load_batches(batches, mode=load_mode)
+        else:
+            # transform was skipped: read its output (only the loaded columns)
+            loaded = upsert_dataframe(read_processed(columns=LOAD_COLUMNS), mode=load_mode)
+
+        # A failed load must not be checkpointed as complete
+        if loaded is None:
+            raise RuntimeError("Load into MySQL failed")
+        if loaded == 0:
             print("No valid data processed. ETL finished with no load.")
-            return
+        STAGE_ROWS.labels("load").inc(loaded)
+
+        if os.path.exists(PRODUCTION_VALUE_PATH):
+            if load_production_value(read_production_value()) is None:
+                raise RuntimeError("Load of the production value into MySQL failed")
+
+    return [
+        Stage(
+            "extract", extract,
+            outputs=[RAW_FOLDER],
+            params=query_grid(),
+            always=True,
+            # fetched_at timestamps change on every run
+            exclude=[os.path.basename(MANIFEST_PATH)],
+        ),
+        Stage(
+            "transform", transform,
+            requires=["extract"],
+            inputs=[RAW_FOLDER],
+            outputs=[processed_output],
+            params={"format": PROCESSED_FORMAT, "version": PROCESSED_VERSION},
+            exclude=[os.path.basename(MANIFEST_PATH)],
+        ),
+        Stage(
+            "derive", derive,
+            requires=["transform"],
+            inputs=[processed_output],
+            outputs=[PRODUCTION_VALUE_PATH],
+        ),
+        Stage(
+            "load", load,
+            requires=["derive"],
+            inputs=[processed_output, PRODUCTION_VALUE_PATH],
+            params={"mode": load_mode},
+        ),
+    ]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the USDA ETL pipeline")
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Wipe raw/processed data and checkpoints, re-download every combination",
+    )
+    parser.add_argument(
+        "--transform-workers",
+        type=int,
+        default=1,
+        help="Worker processes for the transform (0 = one per CPU, default 1 = serial)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Bounded-memory mode: transform and load in batches, never holding the whole dataset",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=MEMORY_BUDGET_MB,
+        help=f"Memory budget for --stream (default {MEMORY_BUDGET_MB}, env USDA_MEMORY_BUDGET_MB)",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=STAGES,
+        help="Start at this stage (earlier stages are not run)",
+    )
+    parser.add_argument(
+        "--only",
+        choices=STAGES,
+        action="append",
+        help="Run only this stage (repeatable)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last unfinished run, skipping the stages it completed",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run the selected stages even if their inputs are unchanged",
+    )
+    return parser.parse_args()
 
-        # LOAD
-        print("Loading data into MySQL...\n")
-        upsert_dataframe(df, clean_before_insert=True)
 
+def main():
+    args = parse_args()
+    print("     USDA ETL PIPELINE")
+
+    start_metrics_server()
+    context = {}
+    status = "failed"
+
+    try:
+        if args.full_refresh:
+            clean_old_data()
+
+        run_pipeline(
+            build_stages(args),
+            context=context,
+            from_stage=args.from_stage,
+            only=args.only,
+            resume=args.resume,
+            force=args.force,
+        )
+
+        status = "done"
         print("        ETL DONE")
 
     except Exception as e:
         print(f"\nGeneral ETL error: {e}")
+
+    finally:
+        write_run_report(context.get("run_id", "none"), status, {"args": vars(args)})
+
+    if status != "done":
         sys.exit(1)
 
 
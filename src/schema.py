@@ -0,0 +1,96 @@
+import pandas as pd
+import pyarrow as pa
+from records import LOAD_TIME_FORMAT, OBSERVATION_COLUMNS, OPTIONAL_COLUMNS
+from settings import COMMODITIES, METRICS
+
+# Canonical in-memory dtypes of the processed observations frame.
+# String dimensions are categoricals, so filters and groupbys run on
+# integer codes. `value` stays float64: production totals reach tens of
+# billions of bushels, beyond the 24-bit precision of float32.
+YEAR_DTYPE = "int16"
+VALUE_DTYPE = "float64"
+CATEGORY_COLUMNS = [
+    "state_name",
+    "commodity_desc",
+    "statisticcat_desc",
+    "unit_desc",
+    "reference_period_desc",
+    "freq_desc",
+    "short_desc",
+    "normalized_unit",
+]
+
+# Arrow schema of normalized observations (records.normalize_observations)
+# as they travel between processes. Tables read from different raw formats
+# differ in string and timestamp types (legacy JSON, NDJSON, Parquet), so
+# they are cast to it before being concatenated.
+OBSERVATIONS_ARROW_TYPES = {
+    "year": pa.int64(),
+    "value": pa.float64(),
+    "load_time": pa.timestamp("us"),
+}
+OBSERVATIONS_ARROW_SCHEMA = pa.schema([
+    (column, OBSERVATIONS_ARROW_TYPES.get(column, pa.string()))
+    for column in OBSERVATION_COLUMNS + list(OPTIONAL_COLUMNS)
+])
+
+# Categories always present, so frames built from different extracts
+# share category sets; observed values outside them are added, never lost
+KNOWN_CATEGORIES = {
+    "commodity_desc": COMMODITIES,
+    "statisticcat_desc": METRICS,
+}
+
+
+def category_dtype(column, values):
+    """CategoricalDtype with the known categories plus the observed ones, sorted."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        observed = set(values.cat.categories)
+    else:
+        observed = set(values.dropna().unique())
+    categories = sorted(observed | set(KNOWN_CATEGORIES.get(column, [])))
+    return pd.CategoricalDtype(categories)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast an observations frame (or a projection of it) to the canonical
+    dtypes, in place.
+    year becomes int16 (nullable Int16 if some years are missing), load_time
+    datetime64; optional columns get their defaults before being
+    categorized. Returns df.
+    """
+    for column, default in OPTIONAL_COLUMNS.items():
+        if default is not None and column in df.columns and df[column].hasnans:
+            df[column] = df[column].astype(object).fillna(default)
+
+    if "year" in df.columns:
+        year = pd.to_numeric(df["year"], errors="coerce")
+        df["year"] = year.astype(YEAR_DTYPE if year.notna().all() else "Int16")
+    for column in ["value", "normalized_value"]:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(VALUE_DTYPE)
+    if "load_time" in df.columns:
+        df["load_time"] = pd.to_datetime(df["load_time"], errors="coerce", format=LOAD_TIME_FORMAT)
+
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            dtype = category_dtype(column, df[column])
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                # astype() keeps the category order when the sets are equal
+                df[column] = df[column].cat.set_categories(dtype.categories)
+            else:
+                df[column] = df[column].astype(dtype)
+
+    return df
+
+
+def concat_observation_tables(tables):
+    """Concatenate Arrow tables of normalized observations under OBSERVATIONS_ARROW_SCHEMA."""
+    return pa.concat_tables([t.cast(OBSERVATIONS_ARROW_SCHEMA) for t in tables])
+
+
+def read_processed_csv(path):
+    """Read the processed CSV straight into the canonical dtypes."""
+    dtype = {c: "category" for c in CATEGORY_COLUMNS}
+    return apply_schema(pd.read_csv(path, dtype=dtype))
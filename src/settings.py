@@ -0,0 +1,33 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv("config/.env")
+
+
+def env_list(name, default):
+    """Comma-separated list from the environment, upper-cased."""
+    value = os.getenv(name)
+    if not value:
+        return list(default)
+    return [item.strip().upper() for item in value.split(",") if item.strip()]
+
+
+# Query grid: every commodity × metric × state combination is extracted
+# for YEAR_FROM..YEAR_TO. This is the only place the grid is defined.
+COMMODITIES = env_list("USDA_COMMODITIES", ["SOYBEANS", "CORN", "WHEAT"])
+STATES = env_list("USDA_STATES", ["IA", "IL", "MN", "NE", "SD"])
+METRICS = env_list("USDA_METRICS", ["PRICE RECEIVED", "PRODUCTION", "YIELD"])
+
+YEAR_FROM = int(os.getenv("USDA_YEAR_FROM", "2020"))
+YEAR_TO = int(os.getenv("USDA_YEAR_TO", "2024"))
+
+
+def query_grid():
+    """The query grid as a plain dict (used to fingerprint the extract stage)."""
+    return {
+        "commodities": COMMODITIES,
+        "states": STATES,
+        "metrics": METRICS,
+        "year_from": YEAR_FROM,
+        "year_to": YEAR_TO,
+    }
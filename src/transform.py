@@ -1,89 +1,124 @@
 import os
-import json
+import re
+import argparse
 import pandas as pd
+import pyarrow as pa
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from records import normalize_observations, read_raw_file, deduplicate
+from schema import apply_schema, concat_observation_tables
+from processed import ProcessedWriter, write_processed
+from derived import normalize_units
 
-REQUIRED_COLUMNS = [
-    "year",
-    "state_name",
-    "commodity_desc",
-    "statisticcat_desc",
-    "unit_desc",
-    "value",
-]
+load_dotenv("config/.env")
+
+RAW_EXTENSIONS = (".ndjson", ".parquet", ".json")
+# Year range suffix of legacy raw files: corn_IA_yield_2020_2024.json
+LEGACY_SUFFIX = re.compile(r"_\d{4}_\d{4}$")
+
+# Memory ceiling for the streaming transform (--stream), independent of input size
+MEMORY_BUDGET_MB = int(os.getenv("USDA_MEMORY_BUDGET_MB", "512"))
+# Peak process memory per byte of buffered Arrow data: the pandas copy,
+# schema conversion, dedup hashing and the partitioned write each add one
+BATCH_OVERHEAD = 4
 
 
 def process_raw_file(json_path):
     """
-    Processes a JSON file generated by extract.py.
-    Validates columns, cleans invalid data, and returns a DataFrame ready
-    to be combined with other files.
+    Processes a raw file (NDJSON, Parquet or JSON) generated by extract.py.
+    Validates columns, cleans invalid data with the shared vectorized
+    normalization, and returns a DataFrame ready to be combined with other files.
     """
     try:
-        with open(json_path, "r") as f:
-            raw_data = json.load(f)
+        df = read_raw_file(json_path)
     except Exception as e:
         print(f"[ERROR] Could not read {json_path}: {e}")
         return pd.DataFrame()
 
-    if not raw_data:
+    if df.empty:
         print(f"[SKIP] Empty file: {json_path}")
         return pd.DataFrame()
 
-    df = pd.DataFrame(raw_data)
-
-    df.columns = [c.lower() for c in df.columns]
-
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
-    if missing:
-        print(f"[WARNING] Missing columns in {os.path.basename(json_path)}: {missing} → Skipped")
+    try:
+        df, dropped = normalize_observations(df)
+    except ValueError as e:
+        print(f"[WARNING] {e} in {os.path.basename(json_path)} → Skipped")
         return pd.DataFrame()
 
-    df = df[REQUIRED_COLUMNS].copy()
+    if dropped:
+        print(f"[DROP] {os.path.basename(json_path)} → {dropped}")
 
-    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-    df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int64")
+    print(f"[OK] Processed {os.path.basename(json_path)} → {len(df)} rows")
+    return df
 
-    df.dropna(subset=["year", "state_name", "commodity_desc", "value"], inplace=True)
 
-    df = df[df["value"] > 0]
+def process_raw_file_arrow(json_path):
+    """
+    Process-pool worker: same as process_raw_file, but returns an Arrow table,
+    which is pickled as a few contiguous column buffers instead of Python objects.
+    """
+    return pa.Table.from_pandas(process_raw_file(json_path), preserve_index=False)
 
-    df = df[df["state_name"].str.strip() != ""]
 
-    print(f"[OK] Processed {os.path.basename(json_path)} → {len(df)} rows")
-    return df
+def list_raw_files(raw_folder="data/raw"):
+    """Raw data files in deterministic (sorted) order."""
+    return [
+        os.path.join(raw_folder, file)
+        for file in sorted(os.listdir(raw_folder))
+        # manifest.json is extract.py's incremental fetch record, not data
+        if file.endswith(RAW_EXTENSIONS) and file != "manifest.json"
+    ]
 
 
-def process_all_raw(raw_folder="data/raw"):
+def process_all_raw(raw_folder="data/raw", workers=1):
     """
-    Procesa todos los JSON válidos dentro de data/raw y genera
-    un único CSV combinado en data/processed/.
+    Procesa todos los archivos raw válidos (NDJSON, Parquet o JSON) dentro
+    de data/raw y genera el dataset procesado en data/processed/ (Parquet
+    particionado por estadística/commodity/año, o un CSV único con
+    USDA_PROCESSED_FORMAT=csv).
+    Con workers > 1 (0 = uno por CPU) los archivos se procesan en un pool de
+    procesos; el resultado es idéntico al modo serial.
     """
     if not os.path.exists(raw_folder):
         print(f"[ERROR] Folder not found: {raw_folder}")
         return pd.DataFrame()
 
-    all_dfs = []
+    files = list_raw_files(raw_folder)
+    workers = workers or os.cpu_count()
 
-    for file in sorted(os.listdir(raw_folder)):
-        if not file.endswith(".json"):
-            continue
+    if workers > 1 and len(files) > 1:
+        print(f"[INFO] Transforming {len(files)} files with {workers} workers")
+        chunksize = max(1, len(files) // (workers * 4))
 
-        file_path = os.path.join(raw_folder, file)
-        df = process_raw_file(file_path)
+        # map() yields results in input order, so output matches the serial path
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tables = [
+                t for t in executor.map(process_raw_file_arrow, files, chunksize=chunksize)
+                if t.num_rows
+            ]
 
-        if not df.empty:
-            all_dfs.append(df)
+        combined = concat_observation_tables(tables).to_pandas() if tables else pd.DataFrame()
+    else:
+        all_dfs = [df for df in map(process_raw_file, files) if not df.empty]
+        combined = pd.concat(all_dfs, ignore_index=True) if all_dfs else pd.DataFrame()
 
-    if not all_dfs:
-        print("[ERROR] No valid JSON files found.")
+    if combined.empty:
+        print("[ERROR] No valid raw files found.")
         return pd.DataFrame()
 
-    combined = pd.concat(all_dfs, ignore_index=True)
+    apply_schema(combined)
+
+    # Una fila por clave natural: la última revisión publicada (load_time)
+    combined, duplicates = deduplicate(combined)
+    if duplicates:
+        print(f"[DEDUP] Dropped {duplicates} superseded or duplicate rows")
+
+    # Unidades normalizadas ($ / TON, TONS, TONS / ACRE) junto a las publicadas
+    normalize_units(combined)
 
     # Export final
-    os.makedirs("data/processed", exist_ok=True)
-    output_path = "data/processed/usda_processed.csv"
-    combined.to_csv(output_path, index=False)
+    output_path = write_processed(combined)
 
     print(f"\n[SAVED] Final dataset → {len(combined)} rows")
     print(f"[PATH] {output_path}")
@@ -91,5 +126,146 @@ def process_all_raw(raw_folder="data/raw"):
     return combined
 
 
+def raw_combination(path):
+    """Combination of a raw file: its name without extension or legacy year suffix."""
+    return LEGACY_SUFFIX.sub("", os.path.splitext(path)[0])
+
+
+def raw_groups(files):
+    """
+    Group raw files by combination (raw_combination), so the legacy
+    <combination>_<from>_<to>.json and the current .ndjson/.parquet of one
+    commodity/metric/state always land in the same batch.
+    """
+    groups = {}
+    for path in files:
+        groups.setdefault(raw_combination(path), []).append(path)
+    return list(groups.values())
+
+
+def iter_raw_tables(groups, workers):
+    """
+    Yield (group, [Arrow tables]) in input order. With workers > 1 at most
+    2 × workers groups are in flight, so results never pile up in memory
+    ahead of the consumer (unlike executor.map, which submits everything).
+    """
+    if workers <= 1:
+        for group in groups:
+            yield group, [process_raw_file_arrow(path) for path in group]
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        groups = iter(groups)
+        for group in groups:
+            pending.append((group, [executor.submit(process_raw_file_arrow, p) for p in group]))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            group, futures = pending.popleft()
+            yield group, [f.result() for f in futures]
+
+            following = next(groups, None)
+            if following is not None:
+                pending.append((following, [executor.submit(process_raw_file_arrow, p) for p in following]))
+
+
+def process_all_raw_streaming(raw_folder="data/raw", workers=1, memory_budget_mb=MEMORY_BUDGET_MB):
+    """
+    Bounded-memory variant of process_all_raw for datasets larger than
+    RAM: raw files are buffered in batches of at most
+    memory_budget_mb / BATCH_OVERHEAD bytes of Arrow data, and each batch
+    is normalized, deduplicated and appended to the processed output with
+    ProcessedWriter. The combined DataFrame is never materialized.
+    Deduplicating per batch is equivalent to doing it globally: every
+    natural key belongs to a single commodity/metric/state combination,
+    whose files are kept together (raw_groups).
+    Returns a dict with rows, batches and duplicates.
+    """
+    stats = {"rows": 0, "batches": 0, "duplicates": 0}
+
+    if not os.path.exists(raw_folder):
+        print(f"[ERROR] Folder not found: {raw_folder}")
+        return stats
+
+    groups = raw_groups(list_raw_files(raw_folder))
+    workers = workers or os.cpu_count()
+    budget_bytes = memory_budget_mb * 1024 * 1024 // BATCH_OVERHEAD
+
+    print(
+        f"[INFO] Streaming {len(groups)} file groups "
+        f"(budget {memory_budget_mb} MB, {max(workers, 1)} workers)"
+    )
+
+    writer = ProcessedWriter()
+    buffered, buffered_bytes = [], 0
+
+    def flush():
+        batch = concat_observation_tables(buffered).to_pandas()
+        buffered.clear()
+
+        apply_schema(batch)
+        batch, duplicates = deduplicate(batch)
+        writer.write(normalize_units(batch))
+
+        stats["duplicates"] += duplicates
+        print(f"[BATCH] {writer.batches} → {len(batch)} rows")
+
+    for _, tables in iter_raw_tables(groups, workers):
+        tables = [t for t in tables if t.num_rows]
+        if not tables:
+            continue
+
+        buffered.extend(tables)
+        buffered_bytes += sum(t.nbytes for t in tables)
+
+        if buffered_bytes >= budget_bytes:
+            flush()
+            buffered_bytes = 0
+
+    if buffered:
+        flush()
+
+    if not writer.rows:
+        print("[ERROR] No valid raw files found.")
+        return stats
+
+    if stats["duplicates"]:
+        print(f"[DEDUP] Dropped {stats['duplicates']} superseded or duplicate rows")
+
+    stats.update(rows=writer.rows, batches=writer.batches)
+    print(f"\n[SAVED] Final dataset → {writer.rows} rows in {writer.batches} batches")
+    print(f"[PATH] {writer.path}")
+
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transform raw USDA extracts")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for the transform (0 = one per CPU, default 1 = serial)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Bounded-memory mode: transform and write the raw files in batches",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=MEMORY_BUDGET_MB,
+        help=f"Memory budget for --stream (default {MEMORY_BUDGET_MB}, env USDA_MEMORY_BUDGET_MB)",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    process_all_raw()
+    args = parse_args()
+    if args.stream:
+        process_all_raw_streaming(workers=args.workers, memory_budget_mb=args.memory_budget_mb)
+    else:
+        process_all_raw(workers=args.workers)